@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for fetch-nba-data.py
+Times each pipeline stage against synthetic fixtures served by a local stub, so no
+real NBA or HoopsHype request is ever made.
+
+Usage: python3 scripts/bench-fetch-nba-data.py [--sizes 500,5000,50000] [--latency SECONDS]
+                                               [--workers N] [--bulk-bios] [--output FILE]
+
+Fixtures follow the column layouts nba_api expects for LeagueDashPlayerStats,
+CommonTeamRoster, CommonPlayerInfo, PlayerIndex and LeagueDashPlayerBioStats, plus a
+HoopsHype-style salary table. Each run appends one JSON line of per-stage wall and
+CPU times to --output, tagged with the current git commit, so runs can be compared
+across commits.
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(SCRIPT_DIR, '.cache', 'bench-results.jsonl')
+
+
+def load_fetcher():
+    """Import fetch-nba-data.py, whose file name is not a valid module name.
+
+    Reuses the module if it is already loaded, e.g. by the tests importing this harness.
+    """
+    if 'fetch_nba_data' in sys.modules:
+        module = sys.modules['fetch_nba_data']
+        module.import_fetch_stack()
+        return module
+    spec = importlib.util.spec_from_file_location('fetch_nba_data', os.path.join(SCRIPT_DIR, 'fetch-nba-data.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['fetch_nba_data'] = module
+    spec.loader.exec_module(module)
+    module.import_fetch_stack()
+    return module
+
+
+fetcher = load_fetcher()
+
+from nba_api.stats.endpoints import (  # noqa: E402  (installed by import_fetch_stack if missing)
+    commonplayerinfo,
+    commonteamroster,
+    leaguedashplayerbiostats,
+    leaguedashplayerstats,
+    playerindex,
+)
+from nba_api.stats.static import teams  # noqa: E402
+
+FIRST_NAMES = ['James', 'Luka', 'Nikola', 'Jalen', 'Tyrese', 'Anthony', 'Kevin', 'Jaren', 'Dereck', 'Bogdan']
+LAST_NAMES = ['Smith', 'Doncic', 'Jokic', 'Brown', 'Haliburton', 'Davis', 'Porter', 'Jackson', 'Lively', 'Bogdanovic']
+ACCENTED = {'Doncic': 'Dončić', 'Jokic': 'Jokić', 'Bogdanovic': 'Bogdanović'}
+SUFFIXES = [' Jr.', ' III', ' II']
+
+
+class SyntheticLeague:
+    """Deterministic fake league of `size` players spread over the 30 NBA teams.
+
+    Roster names sometimes carry accents or suffixes that the salary table omits,
+    like the real data, so name joins can be measured.
+    """
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.rng = random.Random(seed)
+        self.team_ids = [team['id'] for team in teams.get_teams()]
+        self.players = [self._player(100000 + i, self.team_ids[i % len(self.team_ids)]) for i in range(size)]
+        self.by_id = {p['PLAYER_ID']: p for p in self.players}
+
+    def _player(self, player_id: int, team_id: int) -> Dict[str, Any]:
+        rng = self.rng
+        first = rng.choice(FIRST_NAMES)
+        surname = rng.choice(LAST_NAMES)
+        salary_last = f"{surname}{player_id}"
+        last = f"{ACCENTED.get(surname, surname)}{player_id}" if rng.random() < 0.5 else salary_last
+        suffix = rng.choice(SUFFIXES) if rng.random() < 0.06 else ''
+        minutes = round(rng.uniform(0, 38), 1)
+        fga = round(rng.uniform(0, 22) * minutes / 38, 1)
+        fg3a = round(min(fga, rng.uniform(0, 10)), 1)
+        height = rng.randint(70, 88)
+        return {
+            'PLAYER_ID': player_id,
+            'TEAM_ID': team_id,
+            'PLAYER_NAME': f"{first} {last}{suffix}",
+            'SALARY_NAME': f"{first} {salary_last}",
+            'AGE': rng.randint(19, 39),
+            'GP': rng.randint(1, 82),
+            'MIN': minutes,
+            'FGA': fga,
+            'FG_PCT': round(rng.uniform(0.3, 0.65), 3),
+            'FG3A': fg3a,
+            'FG3_PCT': round(rng.uniform(0, 0.45), 3),
+            'FTA': round(rng.uniform(0, 8), 1),
+            'FT_PCT': round(rng.uniform(0.5, 0.95), 3),
+            'PTS': round(rng.uniform(0, 32) * minutes / 38, 1),
+            'REB': round(rng.uniform(0, 13) * minutes / 38, 1),
+            'AST': round(rng.uniform(0, 10) * minutes / 38, 1),
+            'STL': round(rng.uniform(0, 2), 1),
+            'BLK': round(rng.uniform(0, 3), 1),
+            'TOV': round(rng.uniform(0, 4), 1),
+            'HEIGHT': f"{height // 12}-{height % 12}",
+            'WEIGHT': str(rng.randint(170, 290)),
+            'POSITION': rng.choice(['Guard', 'Forward', 'Center', 'Guard-Forward', 'Forward-Center']),
+            'JERSEY': str(rng.randint(0, 99)),
+            'BIRTHDATE': f"{rng.randint(1986, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00",
+            'SEASON_EXP': rng.randint(0, 18),
+            'DRAFT_YEAR': str(rng.randint(2006, 2024)) if rng.random() < 0.8 else 'Undrafted',
+            'SALARY': rng.randint(1_100_000, 55_000_000),
+            'YEARS': rng.randint(1, 5),
+        }
+
+    @staticmethod
+    def _result_set(name: str, headers: List[str], rows: List[Dict]) -> Dict:
+        return {'name': name, 'headers': headers, 'rowSet': [[row.get(h, 0) for h in headers] for row in rows]}
+
+    def stats_response(self) -> Dict:
+        headers = leaguedashplayerstats.LeagueDashPlayerStats.expected_data['LeagueDashPlayerStats']
+        return {'resultSets': [self._result_set('LeagueDashPlayerStats', headers, self.players)]}
+
+    def roster_response(self, team_id: int) -> Dict:
+        headers = commonteamroster.CommonTeamRoster.expected_data['CommonTeamRoster']
+        rows = [{**p, 'TeamID': team_id, 'PLAYER': p['PLAYER_NAME'], 'NUM': p['JERSEY'],
+                 'POSITION': p['POSITION'][0]}
+                for p in self.players if p['TEAM_ID'] == team_id]
+        return {'resultSets': [self._result_set('CommonTeamRoster', headers, rows),
+                               self._result_set('Coaches', ['TEAM_ID'], [])]}
+
+    def player_info_response(self, player_id: int) -> Dict:
+        player = self.by_id.get(player_id)
+        rows = [{**player, 'PERSON_ID': player_id, 'DISPLAY_FIRST_LAST': player['PLAYER_NAME'],
+                 'SCHOOL': 'State', 'COUNTRY': 'USA', 'DRAFT_ROUND': '1', 'DRAFT_NUMBER': '10'}] if player else []
+        data = commonplayerinfo.CommonPlayerInfo.expected_data
+        return {'resultSets': [self._result_set(name, headers, rows if name == 'CommonPlayerInfo' else [])
+                               for name, headers in data.items()]}
+
+    def player_index_response(self) -> Dict:
+        headers = playerindex.PlayerIndex.expected_data['PlayerIndex']
+        rows = [{**p, 'PERSON_ID': p['PLAYER_ID'], 'JERSEY_NUMBER': p['JERSEY'], 'POSITION': p['POSITION'][0],
+                 'COLLEGE': 'State', 'COUNTRY': 'USA', 'DRAFT_ROUND': 1, 'DRAFT_NUMBER': 10,
+                 'DRAFT_YEAR': None if p['DRAFT_YEAR'] == 'Undrafted' else int(p['DRAFT_YEAR']),
+                 'FROM_YEAR': 2024 - p['SEASON_EXP']}
+                for p in self.players]
+        return {'resultSets': [self._result_set('PlayerIndex', headers, rows)]}
+
+    def bio_stats_response(self) -> Dict:
+        headers = leaguedashplayerbiostats.LeagueDashPlayerBioStats.expected_data['LeagueDashPlayerBioStats']
+        return {'resultSets': [self._result_set('LeagueDashPlayerBioStats', headers, self.players)]}
+
+    def salaries_html(self) -> str:
+        rows = []
+        for p in self.players:
+            cells = [f"<td>${p['SALARY'] + year * 1000:,}</td>" for year in range(p['YEARS'])]
+            cells += ['<td>-</td>'] * (6 - p['YEARS'])
+            rows.append(f"<tr><td class=\"name\"><a href=\"/player/{p['PLAYER_ID']}/\">{p['SALARY_NAME']}</a></td>"
+                        f"{''.join(cells)}</tr>")
+        return ("<html><body><table class=\"hh-salaries-ranking-table\"><thead><tr><th>Player</th>"
+                "<th>2024/25</th></tr></thead><tbody>" + ''.join(rows) + "</tbody></table></body></html>")
+
+
+class StubServer:
+    """Serve a SyntheticLeague over HTTP on localhost with a fixed per-request latency."""
+
+    def __init__(self, league: SyntheticLeague, latency: float = 0.0):
+        self.league = league
+        self.latency = latency
+        self.requests = 0
+        self._static = {
+            'leaguedashplayerstats': json.dumps(league.stats_response()).encode(),
+            'playerindex': json.dumps(league.player_index_response()).encode(),
+            'leaguedashplayerbiostats': json.dumps(league.bio_stats_response()).encode(),
+            'salaries': league.salaries_html().encode(),
+        }
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = stub.respond(self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def respond(self, path: str) -> Optional[bytes]:
+        url = urlparse(path)
+        query = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        endpoint = url.path.rstrip('/').split('/')[-1].lower()
+        if endpoint in self._static:
+            return self._static[endpoint]
+        if endpoint == 'commonteamroster':
+            return json.dumps(self.league.roster_response(int(query['TeamID']))).encode()
+        if endpoint == 'commonplayerinfo':
+            return json.dumps(self.league.player_info_response(int(query['PlayerID']))).encode()
+        return None
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def timed(fn: Callable, *args, **kwargs) -> Tuple[Dict[str, float], Any]:
+    """Run fn with its console output suppressed; return wall/CPU seconds and its result."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    with redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return {'wall': round(time.perf_counter() - wall, 4), 'cpu': round(time.process_time() - cpu, 4)}, result
+
+
+def rating_inputs(league: SyntheticLeague) -> List[Tuple[Dict, int, int, int]]:
+    inputs = []
+    for p in league.players:
+        stats = {'pts': p['PTS'], 'reb': p['REB'], 'ast': p['AST'], 'stl': p['STL'], 'blk': p['BLK'],
+                 'tov': p['TOV'], 'min': p['MIN'], 'fg_pct': p['FG_PCT'], 'fg3_pct': p['FG3_PCT'],
+                 'ft_pct': p['FT_PCT'], 'fga': p['FGA'], 'fg3a': p['FG3A'], 'fta': p['FTA']}
+        feet, inches = p['HEIGHT'].split('-')
+        inputs.append((stats, p['AGE'], int(feet) * 12 + int(inches), int(p['WEIGHT'])))
+    return inputs
+
+
+def bench_size(size: int, latency: float, workers: int, bulk_bios: bool, seed: int) -> Dict[str, Any]:
+    league = SyntheticLeague(size, seed)
+    results: Dict[str, Any] = {}
+
+    inputs = rating_inputs(league)
+    results['ratings_scalar'], _ = timed(lambda: [fetcher.calculate_player_ratings(*args) for args in inputs])
+    frame = fetcher.pd.DataFrame([{**stats, 'age': age, 'height': height, 'weight': weight}
+                                  for stats, age, height, weight in inputs])
+    results['ratings_batch'], _ = timed(fetcher.calculate_ratings_batch, frame)
+
+    html = league.salaries_html()
+    results['salaries_parse'], salaries = timed(lambda: fetcher.SalaryIndex(fetcher.parse_salaries_html(html)))
+
+    with StubServer(league, latency) as stub:
+        fetcher.NBAStatsHTTP.base_url = stub.base_url + '/stats/{endpoint}'
+        fetcher.response_cache = None
+        fetcher.transport = fetcher.Transport(rate=1e6, max_rate=1e6, pool_size=workers + 4)
+
+        results['stats_ingest'], stats = timed(fetcher.fetch_all_player_stats)
+        results['rosters_ingest'], rosters = timed(fetcher.fetch_team_rosters)
+        bios = None
+        if bulk_bios:
+            results['bios_bulk'], bios = timed(fetcher.fetch_bulk_player_bios)
+        results['build_players'], players = timed(fetcher.build_players_json, rosters, stats, salaries,
+                                                  workers=workers, bios=bios)
+        results['requests'] = stub.requests
+        results['salary_match_rate'] = salaries.report()['matchRate']
+
+    results['json_serialize'], text = timed(json.dumps, players, indent=2)
+    results['players'] = len(players)
+    results['output_bytes'] = len(text)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark fetch-nba-data.py against synthetic fixtures")
+    parser.add_argument('--sizes', default='500,5000,50000',
+                        help="comma-separated league sizes in players (default: 500,5000,50000)")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="stub latency per request in seconds")
+    parser.add_argument('--workers', type=int, default=16,
+                        help="player detail workers for build_players_json")
+    parser.add_argument('--bulk-bios', action='store_true',
+                        help="use the league-wide bio stage instead of per-player requests")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=RESULTS_PATH,
+                        help="JSON-lines file each run is appended to")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    run = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'latency': args.latency,
+        'workers': args.workers,
+        'bulkBios': args.bulk_bios,
+        'sizes': {},
+    }
+    for size in (int(s) for s in args.sizes.split(',')):
+        print(f"Benchmarking {size} players...")
+        results = bench_size(size, args.latency, args.workers, args.bulk_bios, args.seed)
+        run['sizes'][str(size)] = results
+        for stage, value in results.items():
+            if isinstance(value, dict):
+                print(f"  {stage:<16} {value['wall']:9.3f}s wall {value['cpu']:9.3f}s cpu")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
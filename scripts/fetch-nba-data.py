@@ -3,52 +3,208 @@
 NBA Data Fetcher for Basketball GM
 Fetches real NBA player data from nba_api and generates game ratings.
 
-Usage: python3 scripts/fetch-nba-data.py
+Usage: python3 scripts/fetch-nba-data.py [--workers N] [--rate REQ_PER_SEC] [--max-rate REQ_PER_SEC] [--offline]
+                                        [--resume] [--delta] [--compact] [--season YYYY-YY]
+       python3 scripts/fetch-nba-data.py --backfill 2004-05:2023-24 [--processes N]
+       python3 scripts/fetch-nba-data.py --rerate [--output-dir DIR]
+       python3 scripts/fetch-nba-data.py --export 2021-22:2024-25 [--teams BOS,LAL] [--rerate]
+       python3 scripts/fetch-nba-data.py --synthesize 100000 [--synthetic-teams 300] [--seed N] [--fit-from FILE]
 
-Requirements: pip install nba_api requests beautifulsoup4
+All requests share one pooled keep-alive session. The request rate starts at --rate,
+speeds up towards --max-rate while the stats API keeps up, and backs off exponentially
+with jitter on 429/5xx responses and timeouts.
+
+Responses are cached under scripts/.cache/nba-data with a TTL per endpoint;
+--offline rebuilds the data files from that cache without touching the network,
+and aborts if the stats, rosters, salaries or league-wide bios are not cached.
+Finished player records are checkpointed as they are built; --resume picks up an
+interrupted run and --delta only refetches players who are new, traded or whose
+stat line changed since the existing players.json. --compact also writes minified
+per-team shards with columnar ratings under compact/ and lists them in meta.json;
+the app does not load them yet, it still imports the full players.json.
+Every build also writes indexes.json: rosters as player ID arrays, league-wide and
+per-position rankings by overall, overall and potential percentile tables and team
+payrolls. They are validated against players.json before writing, so clients can
+use them instead of regrouping and sorting the player list at startup.
+
+--backfill builds a range of seasons, one worker process per season, sharing the
+response cache and one global request budget. Each season is written to
+<backfill-dir>/v<DATA_VERSION>/<season>/ with a combined index.json alongside.
+
+Every build writes run-report.json next to meta.json: per-stage wall and CPU time,
+per-endpoint request counts, latency percentiles, retries, failures and cache hits,
+time spent sleeping on the rate limits and backoff, and the errors that were skipped.
+--profile and --trace-memory add a cProfile and a tracemalloc capture to it.
+
+Each build loads its raw stats, rosters, salary table, bio details, contracts and
+ratings into a SQLite warehouse (scripts/.cache/warehouse.sqlite) and exports
+players.json from it by query. --export writes a custom league from the warehouse
+without fetching: any mix of built seasons, optionally a subset of --teams.
+
+--rerate recomputes ratings and potential of an existing players.json from its
+stored season stats and bio fields, e.g. after tuning calculate_player_ratings.
+Players stored without shot attempt volumes keep their ratings unless --force is given.
+It makes no requests and imports only numpy; nba_api, pandas and requests are
+loaded on first use by the fetching paths. With --export it re-rates the exported
+seasons inside the warehouse instead.
+
+--synthesize writes a synthetic league of any size for load-testing the game engine:
+stat lines, bios and contracts are sampled from per-position distributions fitted
+to --fit-from (the real players.json by default), rated with the batch rating model
+and streamed to players.json one record per line, in constant memory. The same
+--seed always gives the same league. The source needs the shot attempt volumes
+current builds store; older ones are refused unless --force is given.
+
+Output files are written atomically (temp file, fsync, rename) and only when their
+content changed; meta.json records the sha256 and size of each data file and shard,
+and keeps its generated time while nothing else changed. A refresh that produces
+the same data therefore leaves the files, their mtimes and the app build untouched.
+
+Requirements: pip install nba_api requests
 """
 
+import argparse
+import bisect
+import cProfile
+import hashlib
 import json
+import multiprocessing
 import time
 import os
+import pstats
+import random
+import re
+import sqlite3
 import sys
+import threading
+import tracemalloc
+import unicodedata
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-
-# Install dependencies if needed
-try:
-    from nba_api.stats.static import players, teams
-    from nba_api.stats.endpoints import (
-        commonplayerinfo,
-        playercareerstats,
-        commonteamroster,
-        leaguedashplayerstats,
-    )
-except ImportError:
-    print("Installing nba_api...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "nba_api", "--quiet", "--break-system-packages"])
-    from nba_api.stats.static import players, teams
-    from nba_api.stats.endpoints import (
-        commonplayerinfo,
-        playercareerstats,
-        commonteamroster,
-        leaguedashplayerstats,
-    )
+from html import unescape
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+
+# The network and dataframe stack is imported by import_fetch_stack() on first use,
+# so local-only modes such as --rerate never load (or install) it
+players = teams = NBAStatsHTTP = np = pd = requests = HTTPAdapter = None
+commonplayerinfo = playercareerstats = commonteamroster = None
+leaguedashplayerbiostats = leaguedashplayerstats = playerindex = None
+
+
+def import_fetch_stack():
+    """Import nba_api, pandas, numpy and requests into the module, installing them if needed."""
+    global players, teams, NBAStatsHTTP, np, pd, requests, HTTPAdapter
+    global commonplayerinfo, playercareerstats, commonteamroster
+    global leaguedashplayerbiostats, leaguedashplayerstats, playerindex
+    if requests is not None:
+        return
+    
+    try:
+        from nba_api.stats.static import players, teams
+        from nba_api.stats.endpoints import (
+            commonplayerinfo,
+            playercareerstats,
+            commonteamroster,
+            leaguedashplayerbiostats,
+            leaguedashplayerstats,
+            playerindex,
+        )
+        from nba_api.stats.library.http import NBAStatsHTTP
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        print("Installing nba_api...")
+        import subprocess
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "nba_api", "--quiet", "--break-system-packages"])
+        from nba_api.stats.static import players, teams
+        from nba_api.stats.endpoints import (
+            commonplayerinfo,
+            playercareerstats,
+            commonteamroster,
+            leaguedashplayerbiostats,
+            leaguedashplayerstats,
+            playerindex,
+        )
+        from nba_api.stats.library.http import NBAStatsHTTP
+        import numpy as np
+        import pandas as pd
+    
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        print("Installing requests...")
+        import subprocess
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "requests", "--quiet", "--break-system-packages"])
+        import requests
+        from requests.adapters import HTTPAdapter
 
-try:
-    import requests
-    from bs4 import BeautifulSoup
-except ImportError:
-    print("Installing requests and beautifulsoup4...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "requests", "beautifulsoup4", "--quiet", "--break-system-packages"])
-    import requests
-    from bs4 import BeautifulSoup
 
 # Output directory
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'data', 'real')
 
+# Season built by default, and where multi-season backfills are written
+DEFAULT_SEASON = '2024-25'
+BACKFILL_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'seasons')
+
+# Bumped when the layout of players.json / meta.json changes
+DATA_VERSION = 1
+
+# Compact bundle: one minified shard per team, ratings stored as parallel arrays
+COMPACT_DIR = 'compact'
+COMPACT_VERSION = 1
+
+# Precomputed lookup indexes written next to players.json
+INDEX_FILE = 'indexes.json'
+INDEX_VERSION = 1
+
+SALARIES_URL = "https://hoopshype.com/salaries/players/"
+
+# On-disk response cache
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '.cache', 'nba-data')
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Eviction frees down to this share of the cap, so a full cache is not rescanned on every write
+CACHE_EVICT_TO = 0.9
+
+# SQLite store every build loads into; players.json and custom leagues are exported from it
+WAREHOUSE_PATH = os.path.join(os.path.dirname(__file__), '.cache', 'warehouse.sqlite')
+
+# Finished player records of in-progress builds, one JSON-lines file per season
+CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), '.cache', 'checkpoints')
+
+# Seconds a cached response stays fresh; bios barely change within a season
+HOUR = 60 * 60
+CACHE_TTLS = {
+    'leaguedashplayerstats': 6 * HOUR,
+    'commonteamroster': 24 * HOUR,
+    'commonplayerinfo': 30 * 24 * HOUR,
+    'playerindex': 24 * HOUR,
+    'leaguedashplayerbiostats': 24 * HOUR,
+    'hoopshype': 24 * HOUR,
+}
+DEFAULT_CACHE_TTL = 24 * HOUR
+# Finished seasons no longer change
+HISTORICAL_CACHE_TTL = 365 * 24 * HOUR
+
+# Stats API request budget in requests per second; starts at the old fixed 0.6 s spacing
+DEFAULT_REQUEST_RATE = 1 / 0.6
+MIN_REQUEST_RATE = 0.2
+MAX_REQUEST_RATE = 8.0
+
+# Retry policy for throttled, failing or timed-out requests
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Run report written next to meta.json; request latency histogram bounds in seconds
+RUN_REPORT_FILE = 'run-report.json'
+RUN_PROFILE_FILE = 'run-profile.prof'
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
 # Team abbreviation mappings
 TEAM_ABBREV_MAP = {
     'PHO': 'PHX', 'GS': 'GSW', 'SA': 'SAS', 'NY': 'NYK', 
@@ -82,6 +238,529 @@ def normalize_position(pos: str) -> str:
     return 'SF'
 
 
+class RateLimiter:
+    """Thread-safe token bucket shared by concurrent request workers."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns the time waited."""
+        with self._lock:
+            self._refill()
+            # Going negative reserves a future token, so waiters queue up fairly
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a response is not in the cache."""
+
+
+class ResponseCache:
+    """Content-keyed JSON response cache with per-endpoint TTLs and LRU eviction.
+
+    Each entry is one file named by a hash of the endpoint and its parameters.
+    Reads bump the file's mtime, so evicting the oldest mtimes first is LRU.
+    The directory is scanned once on startup; after that a running byte total
+    is kept and the directory is only scanned again once it passes max_bytes,
+    evicting down to CACHE_EVICT_TO of it.
+    Processes sharing the cache do not see each other's writes in their totals,
+    which only delays eviction until a scan picks them up.
+    """
+
+    def __init__(self, directory: str, ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: int = CACHE_MAX_BYTES, offline: bool = False):
+        self.directory = directory
+        self.ttls = ttls if ttls is not None else CACHE_TTLS
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        if not offline:
+            self.evict()
+
+    def _path(self, endpoint: str, params: Dict) -> str:
+        key = json.dumps([endpoint, params], sort_keys=True, default=str)
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{endpoint}-{digest[:32]}.json")
+
+    def get(self, endpoint: str, params: Dict) -> Optional[Any]:
+        """Return the cached payload, or None if missing or stale (staleness is ignored offline)."""
+        path = self._path(endpoint, params)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        ttl = self.ttls.get(endpoint, DEFAULT_CACHE_TTL)
+        if params.get('season', DEFAULT_SEASON) < DEFAULT_SEASON:
+            ttl = HISTORICAL_CACHE_TTL
+        if not self.offline and time.time() - entry['fetched'] > ttl:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry['payload']
+
+    def put(self, endpoint: str, params: Dict, payload: Any):
+        path = self._path(endpoint, params)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'endpoint': endpoint, 'params': params, 'fetched': time.time(), 'payload': payload},
+                      f, default=str)
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += size - replaced
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict(int(self.max_bytes * CACHE_EVICT_TO))
+
+    def evict(self, target: Optional[int] = None):
+        """Drop least recently used entries until the cache fits in `target` bytes (max_bytes).
+
+        Scans the whole directory and resets the running total to what is left.
+        """
+        target = self.max_bytes if target is None else target
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+                total += st.st_size
+            entries.sort()
+            for _, size, name in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                total -= size
+            self._bytes = total
+
+    def fetch(self, endpoint: str, params: Dict, loader) -> Any:
+        """Return the cached payload for a request, calling loader() on a miss."""
+        payload = self.get(endpoint, params)
+        if payload is not None:
+            metrics.cache(endpoint, hit=True)
+            return payload
+        if self.offline:
+            raise CacheMiss(f"{endpoint} {params} is not cached")
+        metrics.cache(endpoint, hit=False)
+        payload = loader()
+        self.put(endpoint, params, payload)
+        return payload
+
+
+# Shared cache, configured in main(); None means every request goes to the network
+response_cache: Optional[ResponseCache] = None
+
+
+def cached_request(endpoint: str, params: Dict, loader) -> Any:
+    if response_cache is None:
+        return loader()
+    return response_cache.fetch(endpoint, params, loader)
+
+
+def result_set_frame(raw: Dict, name: str) -> 'pd.DataFrame':
+    """Build a DataFrame from one named result set of a raw stats API response."""
+    for result_set in raw['resultSets']:
+        if result_set['name'] == name:
+            return pd.DataFrame(result_set['rowSet'], columns=result_set['headers'])
+    raise KeyError(f"Result set {name} not in response")
+
+
+def result_set_columns(raw: Dict, name: str) -> Dict[str, Tuple]:
+    """Transpose one named result set of a raw stats API response into {header: column}."""
+    for result_set in raw['resultSets']:
+        if result_set['name'] == name:
+            headers = result_set['headers']
+            rows = result_set['rowSet']
+            return dict(zip(headers, zip(*rows) if rows else [()] * len(headers)))
+    raise KeyError(f"Result set {name} not in response")
+
+
+class BuildCheckpoint:
+    """Append-only JSON-lines log of finished player records, keyed by NBA ID."""
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.records: Dict[str, Dict] = {}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A crash can leave a half-written last line
+                        continue
+                    self.records[record['nbaId']] = record
+        self._file = open(path, 'a' if resume else 'w')
+
+    def get(self, player_id: str, team_abbrev: str) -> Optional[Dict]:
+        record = self.records.get(player_id)
+        if record and record['teamId'] == team_abbrev:
+            return record
+        return None
+
+    def add(self, record: Dict):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self, completed: bool = False):
+        """Close the log, deleting it once the build has finished."""
+        self._file.close()
+        if completed:
+            os.remove(self.path)
+
+
+class RunMetrics:
+    """Instrumentation of one build, safe to record from worker threads.
+
+    Collects per-stage wall and CPU time, per-endpoint request counts, latencies,
+    status codes, retries, failures and cache hits, time spent sleeping by reason,
+    free-form counters and the errors fetchers recovered from. summary() renders it
+    all as the JSON run report written next to meta.json.
+
+    Stage CPU time is measured on the thread that ran the stage, so work handed to
+    a worker pool is not included; `cpuSeconds` at the top level covers the process.
+    Sleep totals are summed across threads and can exceed the wall time.
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self.sleeps: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.errors: List[Dict] = []
+        self.extra: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block; repeated stages of the same name accumulate."""
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            with self._lock:
+                entry = self.stages.setdefault(name, {'calls': 0, 'wallSeconds': 0.0, 'cpuSeconds': 0.0})
+                entry['calls'] += 1
+                entry['wallSeconds'] += wall
+                entry['cpuSeconds'] += cpu
+
+    def _endpoint(self, name: str) -> Dict[str, Any]:
+        return self.endpoints.setdefault(name, {'requests': 0, 'retries': 0, 'failures': 0, 'cacheHits': 0,
+                                                'cacheMisses': 0, 'statuses': {}, 'latencies': []})
+
+    def request(self, endpoint: str, latency: float, status: Union[int, str]):
+        """Record one HTTP attempt; `status` is the response code or the exception name."""
+        with self._lock:
+            entry = self._endpoint(endpoint)
+            entry['requests'] += 1
+            entry['latencies'].append(latency)
+            entry['statuses'][str(status)] = entry['statuses'].get(str(status), 0) + 1
+
+    def retry(self, endpoint: str):
+        with self._lock:
+            self._endpoint(endpoint)['retries'] += 1
+
+    def failure(self, endpoint: str):
+        with self._lock:
+            self._endpoint(endpoint)['failures'] += 1
+
+    def cache(self, endpoint: str, hit: bool):
+        with self._lock:
+            self._endpoint(endpoint)['cacheHits' if hit else 'cacheMisses'] += 1
+
+    def slept(self, reason: str, seconds: float):
+        if seconds > 0:
+            with self._lock:
+                self.sleeps[reason] = self.sleeps.get(reason, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def error(self, message: str, **context):
+        """Print a recovered error and keep it for the run report."""
+        print(message)
+        with self._lock:
+            self.errors.append({'message': message, 'time': datetime.now().isoformat(), **context})
+
+    @staticmethod
+    def latency_summary(latencies: List[float]) -> Dict[str, Any]:
+        """Nearest-rank percentiles and a cumulative bucket histogram, in seconds."""
+        if not latencies:
+            return {}
+        ordered = sorted(latencies)
+
+        def percentile(p: float) -> float:
+            return round(nearest_rank(ordered, p), 4)
+
+        histogram = {f"le{bound:g}": bisect.bisect_right(ordered, bound) for bound in LATENCY_BUCKETS}
+        histogram['inf'] = len(ordered)
+        return {
+            'mean': round(sum(ordered) / len(ordered), 4),
+            'p50': percentile(0.5), 'p90': percentile(0.9), 'p99': percentile(0.99),
+            'max': round(ordered[-1], 4),
+            'histogram': histogram,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for name, entry in sorted(self.endpoints.items()):
+                endpoints[name] = {key: value for key, value in entry.items() if key != 'latencies'}
+                endpoints[name]['latency'] = self.latency_summary(entry['latencies'])
+            return {
+                'started': self.started.isoformat(),
+                'wallSeconds': round(time.perf_counter() - self._wall_start, 3),
+                'cpuSeconds': round(time.process_time() - self._cpu_start, 3),
+                'stages': {name: {'calls': entry['calls'], 'wallSeconds': round(entry['wallSeconds'], 3),
+                                  'cpuSeconds': round(entry['cpuSeconds'], 3)}
+                           for name, entry in self.stages.items()},
+                'requests': {
+                    'total': sum(entry['requests'] for entry in self.endpoints.values()),
+                    'retries': sum(entry['retries'] for entry in self.endpoints.values()),
+                    'failures': sum(entry['failures'] for entry in self.endpoints.values()),
+                    'endpoints': endpoints,
+                },
+                'sleepSeconds': {reason: round(seconds, 3) for reason, seconds in sorted(self.sleeps.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'errors': list(self.errors),
+                **self.extra,
+            }
+
+    def report(self):
+        summary = self.summary()
+        print("\nStage timings (wall / cpu):")
+        for name, entry in summary['stages'].items():
+            print(f"  {name:<20} {entry['wallSeconds']:8.2f}s {entry['cpuSeconds']:8.2f}s")
+        requests_summary = summary['requests']
+        print(f"Requests: {requests_summary['total']} sent, {requests_summary['retries']} retried, "
+              f"{requests_summary['failures']} failed")
+        for name, entry in requests_summary['endpoints'].items():
+            latency = entry['latency']
+            line = f"  {name:<26} {entry['requests']:5d} sent, {entry['cacheHits']:5d} cached"
+            if latency:
+                line += f", p50 {latency['p50'] * 1000:.0f}ms p99 {latency['p99'] * 1000:.0f}ms"
+            print(line)
+        if summary['sleepSeconds']:
+            print("Slept: " + ", ".join(f"{reason} {seconds:.1f}s"
+                                        for reason, seconds in summary['sleepSeconds'].items()))
+        if summary['errors']:
+            print(f"Errors: {len(summary['errors'])} (see {RUN_REPORT_FILE})")
+
+
+def nearest_rank(ordered: List[Any], fraction: float) -> Any:
+    """Nearest-rank percentile of an ascending, non-empty list; `fraction` is 0-1."""
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+# Metrics of the build in progress; build_season starts a fresh one per season
+metrics = RunMetrics()
+
+
+def resolve(value: Any) -> Any:
+    """Wait for a pipeline stage result when `value` is a Future."""
+    return value.result() if isinstance(value, Future) else value
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket that speeds up while the upstream keeps up and halves on throttling."""
+
+    def __init__(self, rate: float, min_rate: float = MIN_REQUEST_RATE, max_rate: float = MAX_REQUEST_RATE,
+                 burst: int = 1, step: float = 0.25, slow_latency: float = 2.0):
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.step = step
+        self.slow_latency = slow_latency
+
+    def _set_rate(self, rate: float):
+        with self._lock:
+            # Settle tokens earned at the old rate before switching
+            self._refill()
+            self.rate = rate
+
+    def on_success(self, latency: float):
+        """Additive increase while responses come back quickly."""
+        if latency < self.slow_latency and self.rate < self.max_rate:
+            self._set_rate(min(self.max_rate, self.rate + self.step))
+
+    def on_throttle(self):
+        """Multiplicative decrease on 429/5xx responses and timeouts."""
+        self._set_rate(max(self.min_rate, self.rate / 2))
+
+
+class SharedRateLimiter:
+    """Fixed request budget shared by several processes.
+
+    Each acquire reserves the next free slot on a schedule kept in shared memory,
+    so N backfill workers together never exceed `rate` requests per second.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_slot = multiprocessing.Value('d', 0.0)
+
+    def acquire(self) -> float:
+        with self._next_slot.get_lock():
+            now = time.monotonic()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class FetchError(Exception):
+    """Raised when a request still fails after all retries."""
+
+
+class Transport:
+    """Shared HTTP layer for every fetcher.
+
+    One requests.Session with a pooled keep-alive adapter (also installed as the
+    nba_api session), an AdaptiveRateLimiter for stats API calls, and bounded
+    retries with full-jitter exponential backoff. Backfill workers also pass a
+    SharedRateLimiter that caps the combined rate of all processes.
+    """
+
+    def __init__(self, rate: float = DEFAULT_REQUEST_RATE, min_rate: float = MIN_REQUEST_RATE,
+                 max_rate: float = MAX_REQUEST_RATE, retries: int = MAX_RETRIES, pool_size: int = 16,
+                 shared_limiter: Optional[SharedRateLimiter] = None):
+        import_fetch_stack()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        NBAStatsHTTP.set_session(self.session)
+        self.limiter = AdaptiveRateLimiter(rate, min_rate, max_rate)
+        self.shared_limiter = shared_limiter
+        self.retries = retries
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def get(self, url: str, params: Any = None, headers: Optional[Dict] = None,
+            timeout: float = 30, throttle: bool = True, name: str = 'other') -> 'requests.Response':
+        """GET with retries; `throttle` routes the call through the stats API rate limiter.
+
+        Attempts, latencies, retries and sleeps are recorded in `metrics` under `name`.
+        """
+        limiter = self.limiter if throttle else None
+        error: Any = None
+        for attempt in range(self.retries + 1):
+            if limiter:
+                metrics.slept('rateLimit', limiter.acquire())
+                if self.shared_limiter:
+                    metrics.slept('sharedBudget', self.shared_limiter.acquire())
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.request(name, time.perf_counter() - start, type(e).__name__)
+                error = e
+            else:
+                latency = time.perf_counter() - start
+                metrics.request(name, latency, response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    if not response.ok:
+                        metrics.failure(name)
+                    response.raise_for_status()
+                    if limiter:
+                        limiter.on_success(latency)
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get('Retry-After')
+            if limiter:
+                limiter.on_throttle()
+            if attempt == self.retries:
+                break
+            delay = self._backoff(attempt, retry_after)
+            metrics.retry(name)
+            metrics.slept('backoff', delay)
+            time.sleep(delay)
+        metrics.failure(name)
+        raise FetchError(f"GET {url} failed after {self.retries + 1} attempts: {error}")
+
+    def stats(self, endpoint: Any) -> Dict:
+        """Send an nba_api endpoint built with get_request=False and return its raw JSON."""
+        url = NBAStatsHTTP.base_url.format(endpoint=endpoint.endpoint)
+        params = sorted(endpoint.parameters.items())
+        return self.get(url, params=params, headers=NBAStatsHTTP.headers, timeout=endpoint.timeout,
+                        name=endpoint.endpoint).json()
+
+
+# Shared transport, configured in main(); get_transport() builds a default one otherwise
+transport: Optional[Transport] = None
+
+
+def get_transport() -> Transport:
+    global transport
+    if transport is None:
+        transport = Transport()
+    return transport
+
+
+def season_start_year(season: str) -> int:
+    return int(season[:4])
+
+
+def season_range(spec: str) -> List[str]:
+    """Expand 'YYYY-YY:YYYY-YY' (inclusive) into a list of season strings."""
+    first, _, last = spec.partition(':')
+    start, end = season_start_year(first), season_start_year(last or first)
+    return [f"{year}-{(year + 1) % 100:02d}" for year in range(start, end + 1)]
+
+
+def season_reference_date(season: str) -> datetime:
+    """Date ages are measured at: today for the current season, mid-season for past ones."""
+    if season >= DEFAULT_SEASON:
+        return datetime.now()
+    return datetime(season_start_year(season) + 1, 2, 1)
+
+
 def clamp(value: float, min_val: float = 25, max_val: float = 99) -> int:
     return int(max(min_val, min(max_val, value)))
 
@@ -169,83 +848,363 @@ def calculate_player_ratings(stats: Dict, age: int, height: int, weight: int) ->
     }
 
 
-def fetch_salaries_hoopshype() -> Dict[str, Dict]:
-    """Scrape player salaries from HoopsHype."""
+RATING_KEYS = (
+    'speed', 'strength', 'jumping', 'endurance', 'insideScoring', 'midRange', 'threePoint',
+    'freeThrow', 'ballHandling', 'passing', 'perimeterDefense', 'interiorDefense',
+    'stealing', 'blocking', 'offensiveRebounding', 'defensiveRebounding',
+    'basketballIQ', 'workEthic', 'durability', 'clutch',
+)
+
+# Stat keys read by calculate_player_ratings and the defaults it uses when missing
+RATING_STAT_DEFAULTS = {
+    'pts': 0, 'reb': 0, 'ast': 0, 'stl': 0, 'blk': 0, 'min': 0, 'fg_pct': 0,
+    'fg3_pct': 0, 'ft_pct': 0, 'tov': 0, 'fg3a': 0, 'fga': 1, 'fta': 0,
+}
+
+
+def calculate_ratings_batch(columns: Any) -> Dict[str, 'np.ndarray']:
+    """Vectorized calculate_player_ratings for a whole table of players.
+
+    `columns` maps column names to equal-length sequences (a DataFrame or a dict of
+    lists) holding the stat columns of RATING_STAT_DEFAULTS plus `age`, `height` and
+    `weight`. Missing stat columns or values (None/NaN) take the scalar defaults.
+    Returns the 20 ratings, `overall` and `potential` as integer arrays. The
+    formulas mirror calculate_player_ratings term for term, so results are
+    identical; keep the two in sync when tuning coefficients. Only numpy is
+    needed, so --rerate runs without the fetch stack.
+    """
+    import numpy as np
+    
+    n = len(columns[next(iter(columns))]) if len(columns) else 0
+    
+    def col(name: str, default: float = 0) -> 'np.ndarray':
+        if name not in columns:
+            return np.full(n, default, dtype=np.float64)
+        values = np.asarray(columns[name], dtype=np.float64)
+        return np.where(np.isnan(values), default, values)
+    
+    def clamp_array(value, min_val: float = 25, max_val: float = 99) -> 'np.ndarray':
+        return np.clip(value, min_val, max_val).astype(np.int64)
+    
+    ppg, rpg, apg, spg, bpg, mpg, fg_pct, fg3_pct, ft_pct, tov, fg3a, fga, fta = (
+        col(key, default) for key, default in RATING_STAT_DEFAULTS.items()
+    )
+    age = col('age')
+    height = col('height')
+    weight = col('weight')
+    
+    has_minutes = mpg > 0
+    safe_mpg = np.where(has_minutes, mpg, 1)
+    
+    def per36(value):
+        return np.where(has_minutes, (value / safe_mpg) * 36, 0)
+    
+    pts_p36 = per36(ppg)
+    reb_p36 = per36(rpg)
+    ast_p36 = per36(apg)
+    stl_p36 = per36(spg)
+    blk_p36 = per36(bpg)
+    fta_p36 = per36(fta)
+    
+    fg3_rate = np.where(fga > 0, fg3a / np.where(fga > 0, fga, 1), 0)
+    height_factor = (height - 69) / 22
+    
+    base_speed = 70 - (height_factor * 25) - ((weight - 180) / 10)
+    age_speed_mod = np.maximum(0, (28 - age) * 0.8)
+    speed = clamp_array(base_speed + age_speed_mod)
+    
+    strength = clamp_array(35 + (weight - 160) / 3 + np.minimum(age - 20, 8) * 1.5)
+    jumping = clamp_array(60 + (height_factor * 10) - np.maximum(0, age - 28) * 2 + blk_p36 * 5)
+    endurance = clamp_array(40 + mpg * 1.5)
+    
+    fg2_pct = np.where(fga > fg3a, (fg_pct * fga - fg3_pct * fg3a) / np.maximum(fga - fg3a, 1), fg_pct)
+    inside_scoring = clamp_array(30 + fg2_pct * 50 + fta_p36 * 3 + height_factor * 10)
+    mid_range = clamp_array(30 + fg_pct * 60 - fg3_rate * 10)
+    three_point = clamp_array(25 + fg3_pct * 100 + np.minimum(fg3a, 8) * 2)
+    free_throw = clamp_array(30 + ft_pct * 65)
+    ball_handling = clamp_array(30 + ast_p36 * 5 - tov * 2 - height_factor * 20)
+    passing = clamp_array(30 + ast_p36 * 8)
+    perimeter_defense = clamp_array(35 + stl_p36 * 10 + (1 - height_factor) * 15)
+    interior_defense = clamp_array(30 + blk_p36 * 12 + height_factor * 20)
+    stealing = clamp_array(30 + stl_p36 * 20)
+    blocking = clamp_array(25 + blk_p36 * 20 + height_factor * 15)
+    
+    orb_rate = reb_p36 * 0.3
+    offensive_rebounding = clamp_array(30 + orb_rate * 8 + height_factor * 15)
+    drb_rate = reb_p36 * 0.7
+    defensive_rebounding = clamp_array(30 + drb_rate * 6 + height_factor * 15)
+    
+    bball_iq = clamp_array(40 + (fg_pct * 30) + ast_p36 * 3 - tov * 3 + np.minimum(age - 22, 8) * 2)
+    work_ethic = clamp_array(50 + (1 - height_factor) * 10)
+    durability = clamp_array(80 - np.maximum(0, age - 28) * 3)
+    clutch = clamp_array(40 + pts_p36 * 1.5 + np.minimum(age - 22, 8) * 2)
+    
+    overall = (
+        inside_scoring * 0.12 + mid_range * 0.08 + three_point * 0.12 +
+        ball_handling * 0.08 + passing * 0.08 + perimeter_defense * 0.08 +
+        interior_defense * 0.08 + offensive_rebounding * 0.05 +
+        defensive_rebounding * 0.07 + speed * 0.08 + strength * 0.04 +
+        bball_iq * 0.08 + endurance * 0.04
+    )
+    overall = clamp_array(np.trunc(overall), 40, 99)
+    potential = np.minimum(99, overall + np.maximum(0, 28 - age).astype(np.int64) * 2)
+    
+    return {
+        'speed': speed, 'strength': strength, 'jumping': jumping, 'endurance': endurance,
+        'insideScoring': inside_scoring, 'midRange': mid_range, 'threePoint': three_point,
+        'freeThrow': free_throw, 'ballHandling': ball_handling, 'passing': passing,
+        'perimeterDefense': perimeter_defense, 'interiorDefense': interior_defense,
+        'stealing': stealing, 'blocking': blocking,
+        'offensiveRebounding': offensive_rebounding, 'defensiveRebounding': defensive_rebounding,
+        'basketballIQ': bball_iq, 'workEthic': work_ethic, 'durability': durability,
+        'clutch': clutch, 'overall': overall, 'potential': potential,
+    }
+
+
+def salaries_url_for_season(season: str, base_url: str = SALARIES_URL) -> str:
+    """HoopsHype lists past seasons under /salaries/players/YYYY-YYYY/."""
+    if season >= DEFAULT_SEASON:
+        return base_url
+    start = season_start_year(season)
+    return f"{base_url.rstrip('/')}/{start}-{start + 1}/"
+
+
+SALARY_TABLE_CLASS = 'hh-salaries-ranking-table'
+SALARY_ROW_RE = re.compile(r'<tr\b', re.I)
+SALARY_CELL_RE = re.compile(r'<td\b[^>]*>(.*?)</td>', re.S | re.I)
+SALARY_LINK_RE = re.compile(r'<a\b[^>]*>(.*?)</a>', re.S | re.I)
+TAG_RE = re.compile(r'<[^>]+>')
+# Opening tag of the salary table; the class name alone also shows up in stylesheets and scripts
+SALARY_TABLE_RE = re.compile(
+    r'<table\b[^>]*\bclass\s*=\s*["\']?[^"\'>]*(?<![\w-])' + re.escape(SALARY_TABLE_CLASS) + r'(?![\w-])', re.I)
+
+
+def salary_table_html(html: str) -> str:
+    """Cut the salary table out of the page so the rest of it is never scanned."""
+    match = SALARY_TABLE_RE.search(html)
+    if not match:
+        return ''
+    start = match.start()
+    end = html.find('</table>', start)
+    return html[start:] if end < 0 else html[start:end + len('</table>')]
+
+
+def cell_text(cell: str) -> str:
+    return unescape(TAG_RE.sub('', cell)).strip()
+
+
+def parse_salaries_html(html: str) -> Dict[str, Dict]:
+    """Parse the HoopsHype salary table into {lowercased name: salary info}.
+
+    The table is sliced out of the page and split into rows and cells with
+    precompiled regular expressions instead of building a document tree.
+    """
+    salaries = {}
+    for row in SALARY_ROW_RE.split(salary_table_html(html))[1:]:
+        cells = SALARY_CELL_RE.findall(row)
+        if len(cells) < 2:
+            continue
+        name_link = SALARY_LINK_RE.search(cells[0])
+        if not name_link:
+            continue
+        yearly_salaries = []
+        for cell in cells[1:7]:
+            sal_text = cell_text(cell).replace('$', '').replace(',', '')
+            if not sal_text or sal_text == '-':
+                break
+            try:
+                yearly_salaries.append(int(sal_text))
+            except ValueError:
+                break
+        if yearly_salaries:
+            salaries[cell_text(name_link.group(1)).lower()] = {
+                'salary': yearly_salaries[0],
+                'yearsRemaining': len(yearly_salaries),
+            }
+    return salaries
+
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+
+def normalize_player_name(name: str) -> str:
+    """Join key for player names: accents folded, punctuation and generational suffixes dropped.
+
+    'Nikola Jokić' -> 'nikola jokic', 'Gary Trent Jr.' -> 'gary trent', 'P.J. Tucker' -> 'pj tucker'.
+    """
+    folded = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    words = folded.replace('-', ' ').replace('.', '').replace("'", '').replace(',', ' ').split()
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+class SalaryIndex:
+    """Salary lookups by NBA ID crosswalk, exact name, then normalized name.
+
+    Built once from parse_salaries_html output, so each join is a dict lookup.
+    Normalized keys shared by several salary rows are ambiguous and never match.
+    Lookups are counted by how they matched, and misses are kept for the run
+    report; build_players_json only calls lookup() from its consuming thread.
+    """
+
+    def __init__(self, salaries: Dict[str, Dict], crosswalk: Optional[Dict[str, str]] = None):
+        self.salaries = salaries
+        self.normalized: Dict[str, Optional[Dict]] = {}
+        for name, info in salaries.items():
+            key = normalize_player_name(name)
+            self.normalized[key] = None if key in self.normalized else info
+        self.crosswalk = {str(player_id): name.lower() for player_id, name in (crosswalk or {}).items()}
+        self.matched = {'crosswalk': 0, 'exact': 0, 'normalized': 0}
+        self.unmatched: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self.salaries)
+
+    def lookup(self, player_id: str, name: str, team_abbrev: Optional[str] = None) -> Optional[Dict]:
+        info = self.salaries.get(self.crosswalk.get(player_id, ''))
+        if info is not None:
+            self.matched['crosswalk'] += 1
+            return info
+        info = self.salaries.get(name.lower())
+        if info is not None:
+            self.matched['exact'] += 1
+            return info
+        info = self.normalized.get(normalize_player_name(name))
+        if info is not None:
+            self.matched['normalized'] += 1
+            return info
+        self.unmatched.append({'nbaId': player_id, 'name': name, 'teamId': team_abbrev})
+        return None
+
+    def report(self) -> Dict[str, Any]:
+        matched = sum(self.matched.values())
+        looked_up = matched + len(self.unmatched)
+        return {
+            'tableSize': len(self.salaries),
+            'lookups': looked_up,
+            'matched': dict(self.matched),
+            'matchRate': round(matched / looked_up, 4) if looked_up else None,
+            'unmatched': list(self.unmatched),
+        }
+
+
+def load_salary_crosswalk(path: Optional[str]) -> Optional[Dict[str, str]]:
+    """Read a JSON object mapping NBA player IDs to their HoopsHype names."""
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def fetch_salaries_hoopshype(url: str = SALARIES_URL, crosswalk: Optional[Dict[str, str]] = None) -> SalaryIndex:
+    """Scrape player salaries from HoopsHype into a SalaryIndex."""
     print("Fetching salaries from HoopsHype...")
     salaries = {}
-    url = "https://hoopshype.com/salaries/players/"
     
     try:
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        response = requests.get(url, headers=headers, timeout=30)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        table = soup.find('table', class_='hh-salaries-ranking-table')
-        
-        if table:
-            rows = table.find_all('tr')[1:]
-            for row in rows:
-                cells = row.find_all('td')
-                if len(cells) >= 2:
-                    name_cell = cells[0]
-                    name_link = name_cell.find('a')
-                    if name_link:
-                        player_name = name_link.text.strip()
-                        salary_cells = cells[1:7]
-                        yearly_salaries = []
-                        for cell in salary_cells:
-                            sal_text = cell.text.strip().replace('$', '').replace(',', '')
-                            if sal_text and sal_text != '-':
-                                try:
-                                    yearly_salaries.append(int(sal_text))
-                                except ValueError:
-                                    break
-                            else:
-                                break
-                        if yearly_salaries:
-                            salaries[player_name.lower()] = {
-                                'salary': yearly_salaries[0],
-                                'yearsRemaining': len(yearly_salaries),
-                            }
-            print(f"Fetched salaries for {len(salaries)} players")
+        html = cached_request('hoopshype', {'url': url},
+                              lambda: get_transport().get(url, headers=headers, throttle=False,
+                                                         name='hoopshype').text)
+        with metrics.stage('salaries.parse'):
+            salaries = parse_salaries_html(html)
+        print(f"Fetched salaries for {len(salaries)} players")
+    except CacheMiss:
+        raise
     except Exception as e:
-        print(f"Error fetching salaries: {e}")
+        metrics.error(f"Error fetching salaries: {e}", stage='salaries', url=url)
     
-    return salaries
+    with metrics.stage('salaries.index'):
+        return SalaryIndex(salaries, crosswalk)
 
 
-def fetch_all_player_stats() -> Dict[str, Dict]:
-    """Fetch current season stats for all players."""
-    print("Fetching player stats for current season...")
-    stats_dict = {}
+# Stat keys used by the ratings and currentSeasonStats, and their LeagueDashPlayerStats columns
+STAT_COLUMNS = {
+    'pts': 'PTS', 'reb': 'REB', 'ast': 'AST', 'stl': 'STL', 'blk': 'BLK', 'tov': 'TOV', 'min': 'MIN',
+    'fg_pct': 'FG_PCT', 'fg3_pct': 'FG3_PCT', 'ft_pct': 'FT_PCT', 'fga': 'FGA', 'fg3a': 'FG3A',
+    'fta': 'FTA', 'gp': 'GP',
+}
+
+
+class StatsRow(Mapping):
+    """Read-only view of one player's stats in a StatsTable, keyed like STAT_COLUMNS."""
+
+    __slots__ = ('_columns', '_position')
+
+    def __init__(self, columns: Dict[str, List], position: int):
+        self._columns = columns
+        self._position = position
+
+    def __getitem__(self, key: str) -> Any:
+        return self._columns[key][self._position]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+
+class StatsTable:
+    """Per-game stats of a season held column-wise, with one player ID index.
+
+    The raw rowSet is transposed once into one list per stat, with missing
+    values replaced by 0, and get() hands out StatsRow views into those columns,
+    so ingestion creates no per-row Series or dict.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, Tuple]] = None):
+        columns = columns or {}
+        player_ids = columns.get('PLAYER_ID', ())
+        self.index = {str(player_id): position for position, player_id in enumerate(player_ids)}
+        self.columns = {}
+        for key, header in STAT_COLUMNS.items():
+            values = columns.get(header)
+            self.columns[key] = ([0] * len(player_ids) if values is None
+                                 else [0 if value is None else value for value in values])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.index
+
+    def get(self, player_id: str, default: Any = None) -> Any:
+        position = self.index.get(player_id)
+        return default if position is None else StatsRow(self.columns, position)
+
+
+def fetch_all_player_stats(season: str = DEFAULT_SEASON) -> StatsTable:
+    """Fetch per-game stats for all players of a season."""
+    print(f"Fetching player stats for {season}...")
+    stats_table = StatsTable()
     
     try:
-        stats = leaguedashplayerstats.LeagueDashPlayerStats(season='2024-25', per_mode_detailed='PerGame')
-        time.sleep(1)
-        df = stats.get_data_frames()[0]
-        
-        for _, row in df.iterrows():
-            player_id = str(row['PLAYER_ID'])
-            stats_dict[player_id] = {
-                'pts': row.get('PTS', 0), 'reb': row.get('REB', 0), 'ast': row.get('AST', 0),
-                'stl': row.get('STL', 0), 'blk': row.get('BLK', 0), 'tov': row.get('TOV', 0),
-                'min': row.get('MIN', 0), 'fg_pct': row.get('FG_PCT', 0) or 0,
-                'fg3_pct': row.get('FG3_PCT', 0) or 0, 'ft_pct': row.get('FT_PCT', 0) or 0,
-                'fga': row.get('FGA', 0), 'fg3a': row.get('FG3A', 0), 'fta': row.get('FTA', 0),
-                'gp': row.get('GP', 0),
-            }
-        print(f"Fetched stats for {len(stats_dict)} players")
+        endpoint = leaguedashplayerstats.LeagueDashPlayerStats(season=season, per_mode_detailed='PerGame',
+                                                              get_request=False)
+        raw = cached_request('leaguedashplayerstats', {'season': season, 'per_mode': 'PerGame'},
+                             lambda: get_transport().stats(endpoint))
+        with metrics.stage('stats.parse'):
+            stats_table = StatsTable(result_set_columns(raw, 'LeagueDashPlayerStats'))
+        print(f"Fetched stats for {len(stats_table)} players")
+    except CacheMiss:
+        # Offline replays abort rather than write a league of zeroed stat lines
+        raise
     except Exception as e:
-        print(f"Error fetching player stats: {e}")
+        metrics.error(f"Error fetching player stats: {e}", stage='stats', season=season)
     
-    return stats_dict
+    return stats_table
 
 
-def fetch_player_details(player_id: int) -> Optional[Dict]:
-    """Fetch detailed player information."""
+def fetch_player_details(player_id: int, as_of: Optional[datetime] = None) -> Optional[Dict]:
+    """Fetch detailed player information, with age measured at `as_of` (default: now)."""
+    as_of = as_of or datetime.now()
     try:
-        info = commonplayerinfo.CommonPlayerInfo(player_id=player_id)
-        time.sleep(0.6)
-        data = info.get_data_frames()[0]
+        endpoint = commonplayerinfo.CommonPlayerInfo(player_id=player_id, get_request=False)
+        raw = cached_request('commonplayerinfo', {'player_id': player_id}, lambda: get_transport().stats(endpoint))
+        with metrics.stage('details.parse'):
+            data = result_set_frame(raw, 'CommonPlayerInfo')
         
         if len(data) > 0:
             row = data.iloc[0]
@@ -268,14 +1227,14 @@ def fetch_player_details(player_id: int) -> Optional[Dict]:
             try:
                 if birthdate_str:
                     birthdate = datetime.strptime(str(birthdate_str)[:10], '%Y-%m-%d')
-                    age = (datetime.now() - birthdate).days // 365
+                    age = (as_of - birthdate).days // 365
                 else:
                     age = 25
             except:
                 age = 25
             
             return {
-                'height': height, 'weight': weight, 'age': age, 'birthYear': datetime.now().year - age,
+                'height': height, 'weight': weight, 'age': age, 'birthYear': as_of.year - age,
                 'position': normalize_position(row.get('POSITION', 'F')),
                 'jersey': row.get('JERSEY', '0'),
                 'yearsExperience': int(row.get('SEASON_EXP', 0)),
@@ -284,37 +1243,132 @@ def fetch_player_details(player_id: int) -> Optional[Dict]:
                 'draftPick': row.get('DRAFT_NUMBER'),
             }
     except Exception as e:
-        print(f"Error fetching player {player_id}: {e}")
+        metrics.error(f"Error fetching player {player_id}: {e}", stage='details', playerId=player_id)
     return None
 
 
-def fetch_team_rosters() -> Dict[str, List[Dict]]:
+def parse_height_inches(values: 'pd.Series', default: int = 78) -> 'pd.Series':
+    """Convert a column of feet-inches strings such as '6-8' to inches."""
+    parts = values.astype(str).str.extract(r'^(\d+)-(\d+)$').astype(float)
+    return (parts[0] * 12 + parts[1]).fillna(default).astype(int)
+
+
+def draft_value(value: Any) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return 'Undrafted'
+    if isinstance(value, float):
+        return str(int(value))
+    return str(value)
+
+
+def fetch_bulk_player_bios(season: str = DEFAULT_SEASON) -> Dict[str, Dict]:
+    """Fetch bio details for every player of a season in two league-wide requests.
+
+    PlayerIndex supplies height, weight, position, school, country and draft info;
+    LeagueDashPlayerBioStats supplies ages. Both are parsed column-wise into one table
+    indexed by player ID. Players missing from either response are left out, so
+    callers fall back to fetch_player_details for them; a response that fails to
+    fetch or parse leaves every player to that fallback.
+    """
+    print("Fetching league-wide player bios...")
+    bios = {}
+    
+    try:
+        index_endpoint = playerindex.PlayerIndex(season=season, get_request=False)
+        bio_endpoint = leaguedashplayerbiostats.LeagueDashPlayerBioStats(season=season, get_request=False)
+        index = result_set_frame(cached_request('playerindex', {'season': season},
+                                                lambda: get_transport().stats(index_endpoint)), 'PlayerIndex')
+        bio_stats = result_set_frame(cached_request('leaguedashplayerbiostats', {'season': season},
+                                                    lambda: get_transport().stats(bio_endpoint)),
+                                     'LeagueDashPlayerBioStats')
+    except CacheMiss:
+        raise
+    except Exception as e:
+        metrics.error(f"Error fetching league-wide bios: {e}", stage='bios', season=season)
+        return bios
+    
+    try:
+        with metrics.stage('bios.parse'):
+            table = index.set_index(index['PERSON_ID'].astype(str))
+            ages = pd.to_numeric(bio_stats['AGE'], errors='coerce')
+            ages.index = bio_stats['PLAYER_ID'].astype(str)
+            table['AGE'] = ages[~ages.index.duplicated()].reindex(table.index)
+            table = table[table['AGE'].notna()]
+    
+            season_start = season_start_year(season)
+            table['HEIGHT_IN'] = parse_height_inches(table['HEIGHT'])
+            table['WEIGHT_LB'] = pd.to_numeric(table['WEIGHT'], errors='coerce').fillna(200).astype(int)
+            table['AGE_YEARS'] = table['AGE'].astype(int)
+            from_year = pd.to_numeric(table['FROM_YEAR'], errors='coerce').fillna(season_start)
+            table['EXPERIENCE'] = (season_start - from_year).clip(lower=0).astype(int)
+            # Match CommonPlayerInfo, which reports draft fields as strings and 'Undrafted'
+            for column in ('DRAFT_YEAR', 'DRAFT_ROUND', 'DRAFT_NUMBER'):
+                table[column] = table[column].map(draft_value)
+    
+            current_year = season_reference_date(season).year
+            columns = ['HEIGHT_IN', 'WEIGHT_LB', 'AGE_YEARS', 'POSITION', 'JERSEY_NUMBER', 'EXPERIENCE',
+                       'COLLEGE', 'COUNTRY', 'DRAFT_YEAR', 'DRAFT_ROUND', 'DRAFT_NUMBER']
+            for (player_id, height, weight, age, position, jersey, experience, college, country,
+                 draft_year, draft_round, draft_pick) in table[columns].itertuples(name=None):
+                bios[player_id] = {
+                    'height': int(height), 'weight': int(weight), 'age': int(age),
+                    'birthYear': current_year - int(age),
+                    'position': normalize_position(position or 'F'),
+                    'jersey': jersey or '0',
+                    'yearsExperience': int(experience),
+                    'college': college or '', 'country': country or 'USA',
+                    'draftYear': draft_year, 'draftRound': draft_round, 'draftPick': draft_pick,
+                }
+    except Exception as e:
+        # A renamed column or malformed value: fall back to per-player details
+        metrics.error(f"Error parsing league-wide bios: {e}", stage='bios', season=season)
+        return {}
+    
+    print(f"Fetched bios for {len(bios)} players")
+    return bios
+
+
+def fetch_team_rosters(season: str = DEFAULT_SEASON) -> Dict[str, List[Dict]]:
     """Fetch rosters for all teams."""
+    return dict(iter_team_rosters(season))
+
+
+def iter_team_rosters(season: str = DEFAULT_SEASON) -> Iterator[Tuple[str, List[Dict]]]:
+    """Yield (abbreviation, roster) for each team as soon as its roster arrives.
+
+    A roster that cannot be fetched even after the transport's retries raises
+    FetchError instead of leaving the team empty; offline, an uncached one raises
+    CacheMiss like the league-wide stages.
+    """
     print("Fetching team rosters...")
-    rosters = {}
     nba_teams = teams.get_teams()
     
     for team in nba_teams:
         team_id = team['id']
         abbrev = normalize_team_abbrev(team['abbreviation'])
+        endpoint = commonteamroster.CommonTeamRoster(team_id=team_id, season=season, get_request=False)
         try:
-            roster = commonteamroster.CommonTeamRoster(team_id=team_id, season='2024-25')
-            time.sleep(0.6)
-            df = roster.get_data_frames()[0]
-            rosters[abbrev] = []
-            for _, row in df.iterrows():
-                rosters[abbrev].append({
-                    'id': str(row['PLAYER_ID']),
-                    'name': row['PLAYER'],
-                    'jersey': str(row.get('NUM', '0')),
-                    'position': normalize_position(row.get('POSITION', 'F')),
-                })
-            print(f"  {abbrev}: {len(rosters[abbrev])} players")
+            # Timed per team, so the stage excludes whatever the consumer does between yields
+            with metrics.stage('rosters'):
+                raw = cached_request('commonteamroster', {'team_id': team_id, 'season': season},
+                                     lambda: get_transport().stats(endpoint))
+                with metrics.stage('rosters.parse'):
+                    columns = result_set_columns(raw, 'CommonTeamRoster')
+                    player_ids = columns['PLAYER_ID']
+                    numbers = columns.get('NUM') or ('0',) * len(player_ids)
+                    positions = columns.get('POSITION') or ('F',) * len(player_ids)
+                    roster = [
+                        {'id': str(player_id), 'name': name, 'jersey': str(number),
+                         'position': normalize_position(position)}
+                        for player_id, name, number, position in zip(player_ids, columns['PLAYER'], numbers,
+                                                                     positions)
+                    ]
+            print(f"  {abbrev}: {len(roster)} players")
+        except CacheMiss:
+            raise
         except Exception as e:
-            print(f"Error fetching roster for {abbrev}: {e}")
-            rosters[abbrev] = []
-    
-    return rosters
+            raise FetchError(f"Error fetching roster for {abbrev}: {e}") from e
+        yield abbrev, roster
 
 
 def build_teams_json() -> List[Dict]:
@@ -353,111 +1407,1381 @@ def build_teams_json() -> List[Dict]:
     ]
 
 
-def build_players_json(rosters: Dict, stats: Dict, salaries: Dict) -> List[Dict]:
-    """Build the complete players JSON."""
+def season_stats_line(player_stats: Dict) -> Dict:
+    """Map fetched per-game stats onto the currentSeasonStats schema."""
+    return {
+        'gamesPlayed': player_stats.get('gp', 0),
+        'minutesPerGame': player_stats.get('min', 0),
+        'points': player_stats.get('pts', 0),
+        'rebounds': player_stats.get('reb', 0),
+        'assists': player_stats.get('ast', 0),
+        'steals': player_stats.get('stl', 0),
+        'blocks': player_stats.get('blk', 0),
+        'turnovers': player_stats.get('tov', 0),
+        'fgPct': player_stats.get('fg_pct', 0),
+        'fg3Pct': player_stats.get('fg3_pct', 0),
+        'ftPct': player_stats.get('ft_pct', 0),
+        'fgAttempts': player_stats.get('fga', 0),
+        'fg3Attempts': player_stats.get('fg3a', 0),
+        'ftAttempts': player_stats.get('fta', 0),
+    }
+
+
+# currentSeasonStats fields read back as the stat keys of calculate_player_ratings
+SEASON_LINE_STATS = {
+    'minutesPerGame': 'min', 'points': 'pts', 'rebounds': 'reb', 'assists': 'ast', 'steals': 'stl',
+    'blocks': 'blk', 'turnovers': 'tov', 'fgPct': 'fg_pct', 'fg3Pct': 'fg3_pct', 'ftPct': 'ft_pct',
+    'fgAttempts': 'fga', 'fg3Attempts': 'fg3a', 'ftAttempts': 'fta',
+}
+
+
+DETAIL_FIELDS = ('height', 'weight', 'age', 'birthYear', 'position', 'yearsExperience',
+                 'college', 'country', 'draftYear', 'draftRound', 'draftPick')
+
+
+def load_previous_players(path: str) -> Dict[str, Dict]:
+    """Index an existing players.json by NBA ID for delta refreshes."""
+    try:
+        with open(path) as f:
+            return {p['nbaId']: p for p in json.load(f)}
+    except (OSError, ValueError) as e:
+        print(f"No usable previous player data at {path}: {e}")
+        return {}
+
+
+def reusable_details(previous: Optional[Dict], team_abbrev: str, player_stats: Dict) -> Optional[Dict]:
+    """Return bio details from a previous record when the player is unchanged.
+
+    A player needs a fresh fetch when they are new, were traded, or their stat line moved.
+    """
+    if not previous or previous.get('teamId') != team_abbrev:
+        return None
+    stored = previous.get('currentSeasonStats')
+    line = season_stats_line(player_stats)
+    # Lines written before a field was added are compared on the fields they have
+    if not stored or stored != {field: line.get(field) for field in stored}:
+        return None
+    return {field: previous.get(field) for field in DETAIL_FIELDS}
+
+
+def assemble_player_record(player_id: str, name: str, team_abbrev: str, jersey: str, details: Dict,
+                           ratings: Dict[str, int], potential: int, salary: int, years: int,
+                           player_stats: Mapping) -> Dict:
+    """Lay out one players.json record; shared by the build and the warehouse export."""
+    name_parts = name.split(' ', 1)
+    first_name = name_parts[0]
+    last_name = name_parts[1] if len(name_parts) > 1 else ''
+    
+    return {
+        'id': f"player-{player_id}",
+        'nbaId': player_id,
+        'firstName': first_name,
+        'lastName': last_name,
+        'position': details['position'],
+        'height': details['height'],
+        'weight': details['weight'],
+        'age': details['age'],
+        'birthYear': details['birthYear'],
+        'yearsExperience': details['yearsExperience'],
+        'college': details.get('college', ''),
+        'country': details.get('country', 'USA'),
+        'jersey': jersey,
+        'teamId': team_abbrev,
+        'draftYear': details.get('draftYear'),
+        'draftRound': details.get('draftRound'),
+        'draftPick': details.get('draftPick'),
+        'stats': ratings,
+        'potential': potential,
+        'contract': {
+            'salary': salary,
+            'years': years,
+            'type': 'standard',
+            'noTradeClause': salary > 35000000,
+        },
+        'currentSeasonStats': season_stats_line(player_stats),
+    }
+
+
+def build_player_record(team_abbrev: str, player: Dict, details: Dict, stats: StatsTable,
+                        salaries: SalaryIndex) -> Dict:
+    """Combine roster entry, bio details, season stats and salary into one player object."""
+    player_id = player['id']
+    player_stats = stats.get(player_id, {})
+    salary_info = (salaries.lookup(player_id, player['name'], team_abbrev)
+                   or {'salary': 2000000, 'yearsRemaining': 1})
+    
+    ratings = calculate_player_ratings(player_stats, details['age'], details['height'], details['weight'])
+    potential = min(99, ratings['overall'] + max(0, 28 - details['age']) * 2)
+    return assemble_player_record(player_id, player['name'], team_abbrev, player['jersey'], details,
+                                  ratings, potential, salary_info.get('salary', 2000000),
+                                  salary_info.get('yearsRemaining', 1), player_stats)
+
+
+def build_players_json(rosters: Union[Dict, Iterable[Tuple[str, List[Dict]]]],
+                       stats: Union[StatsTable, Future], salaries: Union[SalaryIndex, Dict, Future],
+                       workers: int = 1,
+                       checkpoint: Optional[BuildCheckpoint] = None,
+                       previous: Optional[Dict[str, Dict]] = None,
+                       bios: Union[Dict[str, Dict], Future, None] = None,
+                       season: str = DEFAULT_SEASON) -> List[Dict]:
+    """Build the complete players JSON.
+
+    `rosters` is a dict or a stream of (team, roster) pairs such as iter_team_rosters();
+    detail lookups for a team start as soon as its roster is yielded. `stats`,
+    `salaries` and `bios` may be Futures of concurrently running stages and are only
+    waited on when a player first needs them.
+
+    With workers > 1 player details are fetched by a thread pool; the shared
+    transport keeps them within the request budget. Results are consumed in roster
+    order, so the output matches the sequential path exactly. After each team's
+    roster, the leading players whose details are in are built and checkpointed
+    (once stats and salaries have loaded), so an interrupted roster stage loses
+    none of the details already fetched.
+
+    Records already in `checkpoint` are reused as-is and new ones are appended to it.
+    With `previous` (an earlier players.json by NBA ID) unchanged players keep their
+    stored bio details and only the rest are fetched. `bios` from
+    fetch_bulk_player_bios are used next, leaving per-player requests for the gaps.
+    """
     print("\nBuilding player data...")
     all_players = []
     processed_ids = set()
+    pending = deque()
+    counts = {'checkpoint': 0, 'known': 0, 'fetched': 0}
+    failed = []
+    as_of = season_reference_date(season)
     
-    for team_abbrev, roster in rosters.items():
-        for player in roster:
-            player_id = player['id']
-            if player_id in processed_ids:
-                continue
-            processed_ids.add(player_id)
-            
-            details = fetch_player_details(int(player_id))
-            if not details:
-                continue
-            
-            player_stats = stats.get(player_id, {})
-            player_name_lower = player['name'].lower()
-            salary_info = salaries.get(player_name_lower, {'salary': 2000000, 'yearsRemaining': 1})
-            
-            ratings = calculate_player_ratings(player_stats, details['age'], details['height'], details['weight'])
-            
-            name_parts = player['name'].split(' ', 1)
-            first_name = name_parts[0]
-            last_name = name_parts[1] if len(name_parts) > 1 else ''
-            
-            player_obj = {
-                'id': f"player-{player_id}",
-                'nbaId': player_id,
-                'firstName': first_name,
-                'lastName': last_name,
-                'position': details['position'],
-                'height': details['height'],
-                'weight': details['weight'],
-                'age': details['age'],
-                'birthYear': details['birthYear'],
-                'yearsExperience': details['yearsExperience'],
-                'college': details.get('college', ''),
-                'country': details.get('country', 'USA'),
-                'jersey': player['jersey'],
-                'teamId': team_abbrev,
-                'draftYear': details.get('draftYear'),
-                'draftRound': details.get('draftRound'),
-                'draftPick': details.get('draftPick'),
-                'stats': ratings,
-                'potential': min(99, ratings['overall'] + max(0, 28 - details['age']) * 2),
-                'contract': {
-                    'salary': salary_info.get('salary', 2000000),
-                    'years': salary_info.get('yearsRemaining', 1),
-                    'type': 'standard',
-                    'noTradeClause': salary_info.get('salary', 0) > 35000000,
-                },
-                'currentSeasonStats': {
-                    'gamesPlayed': player_stats.get('gp', 0),
-                    'minutesPerGame': player_stats.get('min', 0),
-                    'points': player_stats.get('pts', 0),
-                    'rebounds': player_stats.get('reb', 0),
-                    'assists': player_stats.get('ast', 0),
-                    'steals': player_stats.get('stl', 0),
-                    'blocks': player_stats.get('blk', 0),
-                    'turnovers': player_stats.get('tov', 0),
-                    'fgPct': player_stats.get('fg_pct', 0),
-                    'fg3Pct': player_stats.get('fg3_pct', 0),
-                    'ftPct': player_stats.get('ft_pct', 0),
-                }
-            }
-            all_players.append(player_obj)
+    def resolve_entry(team_abbrev: str, player: Dict) -> Tuple[str, Optional[Dict], Optional[Dict]]:
+        """Return (source, checkpointed record, details) for one roster entry."""
+        player_id = player['id']
+        record = checkpoint.get(player_id, team_abbrev) if checkpoint else None
+        if record is not None:
+            return 'checkpoint', record, None
+        details = None
+        if previous is not None:
+            details = reusable_details(previous.get(player_id), team_abbrev, resolve(stats).get(player_id, {}))
+        if details is None and bios is not None:
+            details = (resolve(bios) or {}).get(player_id)
+        if details is not None:
+            return 'known', None, details
+        return 'fetched', None, fetch_player_details(int(player_id), as_of)
+    
+    def drain(block: bool):
+        """Build the leading pending players in roster order; without `block`, only those already done."""
+        nonlocal stats, salaries
+        if not block and any(isinstance(value, Future) and not value.done() for value in (stats, salaries)):
+            return
+        stats = resolve(stats)
+        salaries = resolve(salaries)
+        if not isinstance(salaries, SalaryIndex):
+            salaries = SalaryIndex(salaries)
+        while pending and (block or pending[0][2].done()):
+            team_abbrev, player, future = pending.popleft()
+            source, record, details = future.result()
+            counts[source] += 1
+            metrics.count(f"players.{source}")
+            if record is None:
+                if not details:
+                    failed.append(player['id'])
+                    continue
+                record = build_player_record(team_abbrev, player, details, stats, salaries)
+                if checkpoint:
+                    checkpoint.add(record)
+            all_players.append(record)
             
             if len(all_players) % 50 == 0:
                 print(f"  Processed {len(all_players)} players...")
     
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        roster_items = rosters.items() if isinstance(rosters, dict) else rosters
+        try:
+            for team_abbrev, roster in roster_items:
+                for player in roster:
+                    if player['id'] in processed_ids:
+                        continue
+                    processed_ids.add(player['id'])
+                    pending.append((team_abbrev, player, executor.submit(resolve_entry, team_abbrev, player)))
+                drain(block=False)
+        except FetchError:
+            # Checkpoint what was fetched before the roster stage failed, so --resume reuses it
+            wait([future for _, _, future in pending] + [value for value in (stats, salaries)
+                                                         if isinstance(value, Future)])
+            drain(block=False)
+            raise
+        drain(block=True)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    if checkpoint or previous is not None or bios is not None:
+        print(f"  {counts['checkpoint']} from checkpoint, {counts['known']} with known bios, "
+              f"{counts['fetched']} fetched")
+    if isinstance(salaries, SalaryIndex):
+        salary_report = salaries.report()
+        metrics.extra['salaryMatch'] = salary_report
+        if salary_report['lookups']:
+            print(f"  Salaries matched for {salary_report['lookups'] - len(salary_report['unmatched'])}"
+                  f"/{salary_report['lookups']} players ({salary_report['matchRate']:.1%})")
+    if failed:
+        metrics.count('players.dropped', len(failed))
+        print(f"  Dropped {len(failed)} players whose details could not be fetched: {', '.join(failed)}")
     print(f"Total players processed: {len(all_players)}")
     return all_players
 
 
-def main():
-    print("=" * 60)
-    print("NBA Data Fetcher for Basketball GM")
-    print("=" * 60)
+def player_field_order() -> List[str]:
+    """Key order of a player record as produced by build_player_record."""
+    return ['id', 'nbaId', 'firstName', 'lastName', 'position', 'height', 'weight', 'age', 'birthYear',
+            'yearsExperience', 'college', 'country', 'jersey', 'teamId', 'draftYear', 'draftRound',
+            'draftPick', 'stats', 'potential', 'contract', 'currentSeasonStats']
+
+
+def encode_compact_shard(team_id: str, players: List[Dict]) -> Dict:
+    """Pack one team's players with the ratings moved into per-key parallel arrays."""
+    rating_keys = list(RATING_KEYS) + ['overall']
+    return {
+        'version': COMPACT_VERSION,
+        'team': team_id,
+        'ratings': {key: [p['stats'][key] for p in players] for key in rating_keys},
+        'players': [{k: v for k, v in p.items() if k != 'stats'} for p in players],
+    }
+
+
+def decode_compact_shard(shard: Dict) -> List[Dict]:
+    """Rebuild full player records, in players.json key order, from a compact shard."""
+    ratings = shard['ratings']
+    players = []
+    for i, compact in enumerate(shard['players']):
+        stats = {key: values[i] for key, values in ratings.items()}
+        players.append({field: stats if field == 'stats' else compact[field]
+                        for field in player_field_order() if field == 'stats' or field in compact})
+    return players
+
+
+def write_output(path: str, text: str) -> Tuple[Dict[str, Any], bool]:
+    """Atomically replace `path` with `text` unless it already holds exactly that.
+
+    Content goes to a temp file in the same directory that is fsynced and renamed
+    over the target, so readers never see a truncated file. Unchanged files are
+    not touched at all, keeping their mtime and any bundler cache valid. Returns
+    the sha256 and size recorded in meta.json, and whether the file was written.
+    """
+    data = text.encode('utf-8')
+    info = {'sha256': hashlib.sha256(data).hexdigest(), 'bytes': len(data)}
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                metrics.count('files.unchanged')
+                return info, False
+    except OSError:
+        pass
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    metrics.count('files.written')
+    return info, True
+
+
+def write_json_output(path: str, data: Any) -> Tuple[Dict[str, Any], bool]:
+    """write_output() of `data` serialized the way every data file is."""
+    return write_output(path, json.dumps(data, indent=2))
+
+
+def write_stamped_json(path: str, data: Dict) -> Tuple[Dict, bool]:
+    """Write a document whose `generated` time only moves when the rest of it does.
+
+    When the file already holds the same document apart from `generated`, the
+    stored time is kept, so the output is identical and left unwritten. Returns
+    the document as written and whether it was.
+    """
+    try:
+        with open(path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = None
+    if isinstance(previous, dict) and 'generated' in previous:
+        unstamped = {key: value for key, value in data.items() if key != 'generated'}
+        if {key: value for key, value in previous.items() if key != 'generated'} == unstamped:
+            data = {**data, 'generated': previous['generated']}
+    _, written = write_json_output(path, data)
+    return data, written
+
+
+class StreamedOutput:
+    """write_output() for files written piece by piece, e.g. a synthetic players.json.
+
+    Text goes straight to the temp file while being hashed, so memory stays flat
+    however large the file. On a clean exit the temp file replaces `path` unless
+    the existing file has the same hash, in which case it is discarded. `info`
+    and `written` are set once the block has finished.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.info: Dict[str, Any] = {}
+        self.written = False
+
+    def __enter__(self) -> 'StreamedOutput':
+        self._file = open(self.tmp_path, 'wb')
+        self._hash = hashlib.sha256()
+        self._bytes = 0
+        return self
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        self._hash.update(data)
+        self._bytes += len(data)
+        self._file.write(data)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+        if exc_type is not None:
+            os.remove(self.tmp_path)
+            return False
+        self.info = {'sha256': self._hash.hexdigest(), 'bytes': self._bytes}
+        if file_sha256(self.path) == self.info['sha256']:
+            os.remove(self.tmp_path)
+            metrics.count('files.unchanged')
+        else:
+            os.replace(self.tmp_path, self.path)
+            self.written = True
+            metrics.count('files.written')
+        return False
+
+
+def file_sha256(path: str) -> Optional[str]:
+    """Hash of the file at `path`, read in blocks; None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def encode_compact_bundle(players: List[Dict]) -> List[Tuple[str, int, str]]:
+    """Encode per-team compact shards as (team, player count, JSON text).
+
+    Shards are listed in the order their teams first appear in players.json, so
+    concatenating the decoded shards reproduces players.json exactly; a bundle
+    that does not raises before anything is written.
+    """
+    by_team: Dict[str, List[Dict]] = {}
+    for player in players:
+        by_team.setdefault(player['teamId'], []).append(player)
+    
+    bundle = []
+    decoded = []
+    for team_id, team_players in by_team.items():
+        text = json.dumps(encode_compact_shard(team_id, team_players), separators=(',', ':'))
+        bundle.append((team_id, len(team_players), text))
+        decoded.extend(decode_compact_shard(json.loads(text)))
+    if json.dumps(decoded) != json.dumps(players):
+        raise ValueError("Compact shards do not reproduce players.json")
+    return bundle
+
+
+def write_compact_bundle(bundle: List[Tuple[str, int, str]], output_dir: str) -> Dict:
+    """Write shards from encode_compact_bundle and return the manifest stored in meta.json."""
+    os.makedirs(os.path.join(output_dir, COMPACT_DIR), exist_ok=True)
+    shards = []
+    for team_id, count, text in bundle:
+        file_name = f"{COMPACT_DIR}/players-{team_id}.json"
+        info, _ = write_output(os.path.join(output_dir, file_name), text)
+        shards.append({'team': team_id, 'file': file_name, 'players': count, **info})
+    total = sum(shard['bytes'] for shard in shards)
+    print(f"Saved {len(shards)} compact shards ({total / 1024:.0f} KB)")
+    return {
+        'version': COMPACT_VERSION,
+        'ratingKeys': list(RATING_KEYS) + ['overall'],
+        'totalBytes': total,
+        'shards': shards,
+    }
+
+
+def build_indexes(players: List[Dict], teams: List[Dict]) -> Dict:
+    """Precompute the groupings and orderings clients otherwise derive from players.json.
+
+    - `rosters`: team ID -> player IDs in players.json order, for every team;
+      players whose team is not in teams.json are listed in `freeAgents`
+    - `byOverall` and `byPosition`: player IDs ranked by overall, then potential,
+      best first, league-wide and per position
+    - `percentiles`: nearest-rank overall and potential values for 0..100 percent
+    - `payroll`: team ID -> summed contract salaries of its roster
+    """
+    rosters: Dict[str, List[str]] = {team['id']: [] for team in teams}
+    free_agents = []
+    for player in players:
+        if player['teamId'] in rosters:
+            rosters[player['teamId']].append(player['id'])
+        else:
+            free_agents.append(player['id'])
+    salaries = {player['id']: player['contract']['salary'] for player in players}
+    
+    ranked = sorted(players, key=lambda player: (-player['stats']['overall'], -player['potential'], player['id']))
+    by_position: Dict[str, List[str]] = {}
+    for player in ranked:
+        by_position.setdefault(player['position'], []).append(player['id'])
+    
+    percentiles = {}
+    for field, values in (('overall', [player['stats']['overall'] for player in players]),
+                          ('potential', [player['potential'] for player in players])):
+        ordered = sorted(values)
+        percentiles[field] = [nearest_rank(ordered, p / 100) for p in range(101)] if ordered else []
+    
+    return {
+        'version': INDEX_VERSION,
+        'totalPlayers': len(players),
+        'rosters': rosters,
+        'freeAgents': free_agents,
+        'byOverall': [player['id'] for player in ranked],
+        'byPosition': dict(sorted(by_position.items())),
+        'percentiles': percentiles,
+        'payroll': {team_id: sum(salaries[player_id] for player_id in ids) for team_id, ids in rosters.items()},
+    }
+
+
+def validate_indexes(indexes: Dict, players: List[Dict], teams: List[Dict]) -> List[str]:
+    """Check `indexes` against the records they were built from; returns the problems found.
+
+    Checked from the player side rather than by rebuilding: every player is listed
+    exactly once in the rosters, the league ranking and the position ranks, under
+    its own team and position; rankings never go up in overall; payrolls add up;
+    and each percentile table rises from the lowest value to the highest.
+    """
+    problems = []
+    by_id = {player['id']: player for player in players}
+    if len(by_id) != len(players) or indexes['totalPlayers'] != len(players):
+        problems.append(f"index covers {indexes['totalPlayers']} players, players.json has "
+                        f"{len(players)} records with {len(by_id)} distinct IDs")
+    if set(indexes['rosters']) != {team['id'] for team in teams}:
+        problems.append("rosters do not list exactly the teams of teams.json")
+    
+    def check_listing(name: str, groups: Dict[str, List[str]], key: Optional[str]):
+        listed = [player_id for ids in groups.values() for player_id in ids]
+        if sorted(listed) != sorted(by_id):
+            problems.append(f"{name} does not list every player exactly once")
+        for group, ids in groups.items():
+            if key and any(by_id.get(player_id, {}).get(key) != group for player_id in ids):
+                problems.append(f"{name}[{group}] lists players with another {key}")
+    
+    check_listing('rosters', {**indexes['rosters'], '': indexes['freeAgents']}, None)
+    misplaced = [player_id for team_id, ids in indexes['rosters'].items() for player_id in ids
+                 if by_id.get(player_id, {}).get('teamId') != team_id]
+    if misplaced:
+        problems.append(f"rosters list {len(misplaced)} players under another team")
+    check_listing('byOverall', {'': indexes['byOverall']}, None)
+    check_listing('byPosition', indexes['byPosition'], 'position')
+    
+    for name, ids in (('byOverall', indexes['byOverall']), *indexes['byPosition'].items()):
+        overalls = [by_id[player_id]['stats']['overall'] for player_id in ids if player_id in by_id]
+        if any(a < b for a, b in zip(overalls, overalls[1:])):
+            problems.append(f"{name} is not ranked by overall")
+    
+    for team_id, ids in indexes['rosters'].items():
+        total = sum(by_id[player_id]['contract']['salary'] for player_id in ids if player_id in by_id)
+        if indexes['payroll'].get(team_id) != total:
+            problems.append(f"payroll of {team_id} is {indexes['payroll'].get(team_id)}, its roster earns {total}")
+    
+    for field, table in indexes['percentiles'].items():
+        values = [player['stats']['overall'] if field == 'overall' else player[field] for player in players]
+        if values and (len(table) != 101 or table[0] != min(values) or table[-1] != max(values)
+                       or any(a > b for a, b in zip(table, table[1:]))):
+            problems.append(f"{field} percentiles do not rise from {min(values)} to {max(values)}")
+    return problems
+
+
+def checked_indexes(players: List[Dict], teams: List[Dict]) -> Dict:
+    """build_indexes, raising instead of returning indexes that disagree with players.json."""
+    indexes = build_indexes(players, teams)
+    problems = validate_indexes(indexes, players, teams)
+    if problems:
+        raise ValueError("Indexes do not match players.json: " + "; ".join(problems))
+    return indexes
+
+
+def write_indexes(indexes: Dict, output_dir: str) -> Dict:
+    """Write indexes.json, minified like the compact shards; returns its entry for meta.json."""
+    info, _ = write_output(os.path.join(output_dir, INDEX_FILE), json.dumps(indexes, separators=(',', ':')))
+    return {'version': INDEX_VERSION, 'file': INDEX_FILE, **info}
+
+
+# Warehouse columns of the bio detail fields, and of the stored ratings
+WAREHOUSE_DETAIL_COLUMNS = {
+    'height': 'height', 'weight': 'weight', 'age': 'age', 'birthYear': 'birth_year', 'position': 'position',
+    'yearsExperience': 'years_experience', 'college': 'college', 'country': 'country',
+    'draftYear': 'draft_year', 'draftRound': 'draft_round', 'draftPick': 'draft_pick',
+}
+WAREHOUSE_RATING_COLUMNS = (*RATING_KEYS, 'overall', 'potential')
+
+# Value columns are declared without a type, so SQLite keeps ints, floats, strings
+# and NULLs exactly as fetched and exports reproduce players.json byte for byte
+WAREHOUSE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS players (
+    player_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    last_season TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_seasons (
+    player_id TEXT NOT NULL,
+    season TEXT NOT NULL,
+    {', '.join(STAT_COLUMNS)},
+    PRIMARY KEY (player_id, season)
+);
+CREATE INDEX IF NOT EXISTS player_seasons_season ON player_seasons (season);
+CREATE TABLE IF NOT EXISTS rosters (
+    season TEXT NOT NULL,
+    player_id TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    jersey,
+    position,
+    ordinal INTEGER NOT NULL,
+    PRIMARY KEY (season, player_id)
+);
+CREATE INDEX IF NOT EXISTS rosters_team ON rosters (season, team_id);
+CREATE INDEX IF NOT EXISTS rosters_player ON rosters (player_id);
+CREATE TABLE IF NOT EXISTS player_details (
+    player_id TEXT NOT NULL,
+    season TEXT NOT NULL,
+    {', '.join(WAREHOUSE_DETAIL_COLUMNS.values())},
+    PRIMARY KEY (player_id, season)
+);
+CREATE TABLE IF NOT EXISTS salaries (
+    season TEXT NOT NULL,
+    name TEXT NOT NULL,
+    salary INTEGER NOT NULL,
+    years_remaining INTEGER NOT NULL,
+    PRIMARY KEY (season, name)
+);
+CREATE TABLE IF NOT EXISTS contracts (
+    player_id TEXT NOT NULL,
+    season TEXT NOT NULL,
+    salary INTEGER NOT NULL,
+    years INTEGER NOT NULL,
+    PRIMARY KEY (player_id, season)
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    player_id TEXT NOT NULL,
+    season TEXT NOT NULL,
+    {', '.join(f'"{key}" INTEGER NOT NULL' for key in WAREHOUSE_RATING_COLUMNS)},
+    PRIMARY KEY (player_id, season)
+);
+"""
+
+WAREHOUSE_SEASON_TABLES = ('player_seasons', 'rosters', 'player_details', 'salaries', 'contracts', 'ratings')
+
+
+class Warehouse:
+    """Local SQLite store of everything a build fetched, kept across runs.
+
+    Each build loads its season's raw stats, rosters, salary table, bio details,
+    joined contracts and ratings, replacing whatever that season held before.
+    players.json is then exported by query, so a custom league (a subset of
+    teams, a mix of seasons, re-rated players) is an indexed query rather than
+    a refetch. Backfill workers share one file; WAL mode and a generous busy
+    timeout let their per-season transactions queue up.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=120)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(WAREHOUSE_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def load_season(self, season: str, stats: StatsTable, salaries: Dict[str, Dict],
+                    rosters: List[Tuple[str, List[Dict]]], players: List[Dict]):
+        """Replace everything stored for `season` in one transaction."""
+        stat_keys = list(STAT_COLUMNS)
+        detail_fields = list(WAREHOUSE_DETAIL_COLUMNS)
+        roster_rows = []
+        seen = set()
+        for team_abbrev, roster in rosters:
+            for player in roster:
+                if player['id'] not in seen:
+                    seen.add(player['id'])
+                    roster_rows.append((season, player['id'], team_abbrev, player['name'], player['jersey'],
+                                        player['position'], len(roster_rows)))
+        
+        with self.conn:
+            for table in WAREHOUSE_SEASON_TABLES:
+                self.conn.execute(f"DELETE FROM {table} WHERE season = ?", (season,))
+            self.conn.executemany(
+                f"INSERT INTO player_seasons VALUES (?, ?, {', '.join('?' * len(stat_keys))})",
+                ((player_id, season, *(stats.columns[key][position] for key in stat_keys))
+                 for player_id, position in stats.index.items()))
+            self.conn.executemany("INSERT INTO rosters VALUES (?, ?, ?, ?, ?, ?, ?)", roster_rows)
+            self.conn.executemany(
+                "INSERT INTO players VALUES (?, ?, ?) ON CONFLICT (player_id) DO UPDATE "
+                "SET name = excluded.name, last_season = excluded.last_season "
+                "WHERE excluded.last_season >= players.last_season",
+                ((player_id, name, season) for _, player_id, _, name, _, _, _ in roster_rows))
+            self.conn.executemany(
+                "INSERT INTO salaries VALUES (?, ?, ?, ?)",
+                ((season, name, info['salary'], info['yearsRemaining']) for name, info in salaries.items()))
+            self.conn.executemany(
+                f"INSERT INTO player_details VALUES (?, ?, {', '.join('?' * len(detail_fields))})",
+                ((p['nbaId'], season, *(p.get(field) for field in detail_fields)) for p in players))
+            self.conn.executemany(
+                "INSERT INTO contracts VALUES (?, ?, ?, ?)",
+                ((p['nbaId'], season, p['contract']['salary'], p['contract']['years']) for p in players))
+            self.conn.executemany(
+                f"INSERT INTO ratings VALUES (?, ?, {', '.join('?' * len(WAREHOUSE_RATING_COLUMNS))})",
+                ((p['nbaId'], season, *(p['stats'][key] for key in RATING_KEYS), p['stats']['overall'],
+                  p['potential']) for p in players))
+
+    def _season_rows(self, seasons: List[str], teams: Optional[List[str]] = None) -> List[sqlite3.Row]:
+        """Roster rows of built players in `seasons`, a player's latest selected season winning.
+
+        `teams` filters after that pick, so a player who moved is never exported on
+        a former team. Rows come grouped by team, teams in the order they first
+        appear and each team's players in season and build order; with a single
+        season that is simply build order.
+        """
+        season_marks = ', '.join('?' * len(seasons))
+        team_filter = f"AND team_id IN ({', '.join('?' * len(teams))})" if teams else ''
+        stat_select = ', '.join(f"ps.{key} AS stat_{key}" for key in STAT_COLUMNS)
+        detail_select = ', '.join(f"d.{column}" for column in WAREHOUSE_DETAIL_COLUMNS.values())
+        rating_select = ', '.join(f'g."{key}"' for key in WAREHOUSE_RATING_COLUMNS)
+        query = f"""
+            SELECT * FROM (
+                SELECT r.season, r.ordinal, r.player_id, r.team_id, r.name, r.jersey,
+                       {detail_select}, {rating_select}, c.salary, c.years,
+                       ps.player_id IS NOT NULL AS has_stats, {stat_select},
+                       ROW_NUMBER() OVER (PARTITION BY r.player_id ORDER BY r.season DESC) AS pick
+                FROM rosters r
+                JOIN player_details d ON d.player_id = r.player_id AND d.season = r.season
+                JOIN ratings g ON g.player_id = r.player_id AND g.season = r.season
+                JOIN contracts c ON c.player_id = r.player_id AND c.season = r.season
+                LEFT JOIN player_seasons ps ON ps.player_id = r.player_id AND ps.season = r.season
+                WHERE r.season IN ({season_marks})
+            )
+            WHERE pick = 1 {team_filter}
+            ORDER BY season, ordinal
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        rows = cursor.execute(query, [*seasons, *(teams or [])]).fetchall()
+        team_order: Dict[str, int] = {}
+        for row in rows:
+            team_order.setdefault(row['team_id'], len(team_order))
+        rows.sort(key=lambda row: team_order[row['team_id']])
+        return rows
+
+    def export_players(self, seasons: List[str], teams: Optional[List[str]] = None) -> List[Dict]:
+        """players.json records for `seasons`, optionally limited to `teams`.
+
+        Players are grouped by team, in build order within each season. With several
+        seasons a player is exported once, from the latest of them they were
+        rostered in, and only if that season's team is one of `teams`.
+        """
+        players = []
+        for row in self._season_rows(seasons, teams):
+            details = {field: row[column] for field, column in WAREHOUSE_DETAIL_COLUMNS.items()}
+            ratings = {key: row[key] for key in RATING_KEYS}
+            ratings['overall'] = row['overall']
+            player_stats = {key: row[f"stat_{key}"] for key in STAT_COLUMNS} if row['has_stats'] else {}
+            players.append(assemble_player_record(row['player_id'], row['name'], row['team_id'], row['jersey'],
+                                                  details, ratings, row['potential'], row['salary'],
+                                                  row['years'], player_stats))
+        return players
+
+    def rerate(self, seasons: List[str]) -> int:
+        """Recompute stored ratings of `seasons` from stored stats and details in one batch."""
+        stat_select = ', '.join(f"ps.{key}" for key in STAT_COLUMNS)
+        rows = self.conn.execute(f"""
+            SELECT d.player_id, d.season, d.age, d.height, d.weight, {stat_select}
+            FROM player_details d
+            LEFT JOIN player_seasons ps ON ps.player_id = d.player_id AND ps.season = d.season
+            WHERE d.season IN ({', '.join('?' * len(seasons))})
+        """, seasons).fetchall()
+        if not rows:
+            return 0
+        names = ['player_id', 'season', 'age', 'height', 'weight', *STAT_COLUMNS]
+        columns = {name: list(values) for name, values in zip(names, zip(*rows))}
+        ratings = {key: values.tolist() for key, values in calculate_ratings_batch(columns).items()}
+        assignments = ', '.join(f'"{key}" = ?' for key in WAREHOUSE_RATING_COLUMNS)
+        with self.conn:
+            self.conn.executemany(
+                f"UPDATE ratings SET {assignments} WHERE player_id = ? AND season = ?",
+                ([*(ratings[key][i] for key in WAREHOUSE_RATING_COLUMNS), player_id, season]
+                 for i, (player_id, season) in enumerate(zip(columns['player_id'], columns['season']))))
+        return len(rows)
+
+    def seasons(self) -> List[str]:
+        return [season for (season,) in self.conn.execute("SELECT DISTINCT season FROM rosters ORDER BY season")]
+
+
+def rerate_players(players: List[Dict], force: bool = False) -> int:
+    """Recompute `stats` and `potential` of player records in place, in one batch.
+
+    Inputs are each record's currentSeasonStats, age, height and weight, so the
+    result matches a fresh build with the current coefficients. Records written
+    before shot attempt volumes were stored would rate as if the player took no
+    threes or free throws, so they keep their ratings unless `force` is set.
+    Returns how many records lack the attempt volumes.
+    """
+    lines = [player.get('currentSeasonStats') or {} for player in players]
+    missing_attempts = sum(1 for line in lines if 'fgAttempts' not in line)
+    rows = [i for i, line in enumerate(lines) if force or 'fgAttempts' in line]
+    columns: Dict[str, List] = {key: [lines[i].get(field) for i in rows]
+                                for field, key in SEASON_LINE_STATS.items()}
+    for field in ('age', 'height', 'weight'):
+        columns[field] = [players[i][field] for i in rows]
+    ratings = {key: values.tolist() for key, values in calculate_ratings_batch(columns).items()}
+    
+    rating_keys = list(RATING_KEYS) + ['overall']
+    for row, i in enumerate(rows):
+        players[i]['stats'] = {key: ratings[key][row] for key in rating_keys}
+        players[i]['potential'] = ratings['potential'][row]
+    return missing_attempts
+
+
+def rerate(output_dir: str, force: bool = False) -> Dict:
+    """Rewrite the ratings of an existing build from its players.json, fully offline.
+
+    Only numpy is imported; nba_api, pandas and requests are never loaded. Compact
+    shards listed in meta.json are rewritten too. Players without stored shot
+    attempt volumes keep their ratings unless `force` is set (see rerate_players).
+    """
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, 'players.json')) as f:
+        players_data = json.load(f)
+    missing_attempts = rerate_players(players_data, force)
     
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    meta_path = os.path.join(output_dir, 'meta.json')
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {'totalPlayers': len(players_data)}
+    indexes = None
+    try:
+        with open(os.path.join(output_dir, 'teams.json')) as f:
+            indexes = checked_indexes(players_data, json.load(f))
+    except OSError as e:
+        print(f"  Indexes not rewritten, no teams.json: {e}")
+    bundle = encode_compact_bundle(players_data) if meta.get('compact') else None
     
-    stats = fetch_all_player_stats()
-    salaries = fetch_salaries_hoopshype()
-    rosters = fetch_team_rosters()
+    players_file, written = write_json_output(os.path.join(output_dir, 'players.json'), players_data)
+    meta['generated'] = datetime.now().isoformat()
+    meta.setdefault('files', {})['players.json'] = players_file
+    if indexes is not None:
+        meta['indexes'] = write_indexes(indexes, output_dir)
+    if bundle is not None:
+        meta['compact'] = write_compact_bundle(bundle, output_dir)
+    meta, _ = write_stamped_json(meta_path, meta)
+    
+    if missing_attempts and force:
+        print(f"  {missing_attempts} players have no shot attempt volumes stored and were rated "
+              f"as taking no threes or free throws")
+    elif missing_attempts:
+        print(f"  {missing_attempts} players have no shot attempt volumes stored and kept their ratings; "
+              f"rebuild them, or pass --force to re-rate them anyway")
+    rerated = len(players_data) if force else len(players_data) - missing_attempts
+    print(f"Re-rated {rerated} of {len(players_data)} players in {time.perf_counter() - start:.2f}s"
+          f"{'' if written else ' (ratings unchanged)'}")
+    return meta
+
+
+# currentSeasonStats fields, bio fields and salary drawn jointly by LeagueModel
+SYNTHETIC_LINE_FIELDS = ('gamesPlayed', 'minutesPerGame', 'points', 'rebounds', 'assists', 'steals', 'blocks',
+                         'turnovers', 'fgPct', 'fg3Pct', 'ftPct', 'fgAttempts', 'fg3Attempts', 'ftAttempts')
+SYNTHETIC_BIO_FIELDS = ('height', 'weight', 'age', 'yearsExperience')
+# Skewed, non-negative fields modelled on a log scale
+SYNTHETIC_LOG_FIELDS = {'gamesPlayed', 'minutesPerGame', 'points', 'rebounds', 'assists', 'steals', 'blocks',
+                        'turnovers', 'fgAttempts', 'fg3Attempts', 'ftAttempts', 'salary'}
+SYNTHETIC_CHUNK = 10000
+# Synthetic nbaIds start here, well clear of real NBA player IDs
+SYNTHETIC_ID_BASE = 90000000
+
+
+def synthetic_field_value(player: Dict, field: str) -> float:
+    if field == 'salary':
+        return player['contract']['salary']
+    if field in SYNTHETIC_BIO_FIELDS:
+        return player[field]
+    return player['currentSeasonStats'][field]
+
+
+class LeagueModel:
+    """Distributions of a real league, fitted to its players.json, to sample synthetic players from.
+
+    Stat lines, bios and salary are drawn jointly from one multivariate normal per
+    position (skewed fields on a log scale), so correlations such as height with
+    rebounds and blocks, or minutes with every counting stat, carry over. Draws are
+    clipped to the range seen in the source. Names, jerseys, college and country,
+    draft slots and contract lengths are resampled from the source records.
+
+    Only stat line fields every source record has are modelled, and generated
+    records leave the others out. Without shot attempt volumes the ratings come
+    out far below the source's, so such a source is refused unless `force` is set.
+    """
+
+    def __init__(self, players: List[Dict], season: str = DEFAULT_SEASON, force: bool = False):
+        import numpy as np
+        
+        if not players:
+            raise ValueError("cannot fit a league model to an empty players.json")
+        self.season = season
+        lines = [player.get('currentSeasonStats') or {} for player in players]
+        self.fields = [field for field in SYNTHETIC_LINE_FIELDS if all(field in line for line in lines)]
+        self.missing_fields = [field for field in SYNTHETIC_LINE_FIELDS if field not in self.fields]
+        missing_attempts = [field for field in ('fgAttempts', 'fg3Attempts', 'ftAttempts')
+                            if field in self.missing_fields]
+        if missing_attempts and not force:
+            raise ValueError(f"the source lacks {', '.join(missing_attempts)} for some players, so synthetic "
+                             f"players would rate as taking no threes or free throws; fit to a build made "
+                             f"with the current script, or pass --force")
+        self.fields += [*SYNTHETIC_BIO_FIELDS, 'salary']
+        values = np.array([[synthetic_field_value(player, field) or 0 for field in self.fields]
+                           for player in players], dtype=np.float64)
+        self.low = values.min(axis=0)
+        self.high = values.max(axis=0)
+        self.log_mask = np.array([field in SYNTHETIC_LOG_FIELDS for field in self.fields])
+        transformed = np.where(self.log_mask, np.log1p(np.maximum(values, 0)), values)
+        
+        positions = [player['position'] for player in players]
+        self.positions = sorted(set(positions))
+        counts = np.array([positions.count(position) for position in self.positions], dtype=np.float64)
+        self.position_weights = counts / counts.sum()
+        # Positions too rare for a full covariance borrow the league-wide one
+        pooled = (transformed.mean(axis=0), np.cov(transformed, rowvar=False))
+        self.normals = {}
+        for position in self.positions:
+            rows = transformed[[i for i, p in enumerate(positions) if p == position]]
+            if len(rows) > len(self.fields) + 1:
+                self.normals[position] = (rows.mean(axis=0), np.cov(rows, rowvar=False))
+            else:
+                self.normals[position] = pooled
+        
+        self.first_names = [player['firstName'] for player in players]
+        self.last_names = [player['lastName'] for player in players]
+        self.jerseys = [player['jersey'] for player in players]
+        self.origins = [(player.get('college', ''), player.get('country', 'USA')) for player in players]
+        self.drafts = [(player.get('draftRound'), player.get('draftPick')) for player in players]
+        self.contract_years = [player['contract']['years'] for player in players]
+    
+    def sample(self, rng: 'np.random.Generator', n: int) -> Dict[str, Any]:
+        """Draw `n` players as columns: the modelled fields, `position` and categorical picks."""
+        import numpy as np
+        
+        position_index = rng.choice(len(self.positions), size=n, p=self.position_weights)
+        transformed = np.empty((n, len(self.fields)))
+        for i, position in enumerate(self.positions):
+            rows = position_index == i
+            mean, cov = self.normals[position]
+            transformed[rows] = rng.multivariate_normal(mean, cov, size=int(rows.sum()), method='eigh')
+        values = np.clip(np.where(self.log_mask, np.expm1(transformed), transformed), self.low, self.high)
+        
+        columns: Dict[str, Any] = {'position': [self.positions[i] for i in position_index]}
+        for j, field in enumerate(self.fields):
+            if field in ('fgPct', 'fg3Pct', 'ftPct'):
+                columns[field] = np.round(values[:, j], 3)
+            elif field in SYNTHETIC_LINE_FIELDS and field != 'gamesPlayed':
+                columns[field] = np.round(values[:, j], 1)
+            else:
+                columns[field] = np.rint(values[:, j]).astype(np.int64)
+        for name, pool in (('firstName', self.first_names), ('lastName', self.last_names),
+                           ('jersey', self.jerseys), ('origin', self.origins), ('draft', self.drafts),
+                           ('contractYears', self.contract_years)):
+            columns[name] = [pool[i] for i in rng.integers(len(pool), size=n)]
+        return columns
+
+
+def synthetic_teams(count: int) -> List[Dict]:
+    """`count` teams cloned from the real 30; copy k > 1 of a team gets a numbered id, city and division."""
+    base = build_teams_json()
+    synthetic = []
+    for i in range(count):
+        team = dict(base[i % len(base)])
+        copy = i // len(base) + 1
+        if copy > 1:
+            team.update({'id': f"{team['id']}{copy}", 'abbreviation': f"{team['abbreviation']}{copy}",
+                         'city': f"{team['city']} {copy}", 'division': f"{team['division']} {copy}"})
+        synthetic.append(team)
+    return synthetic
+
+
+def iter_synthetic_players(model: LeagueModel, count: int, team_ids: List[str], seed: int) -> Iterator[Dict]:
+    """Generate `count` player records in chunks of SYNTHETIC_CHUNK, rated with calculate_ratings_batch.
+
+    Chunk k draws from its own generator seeded with (seed, k), so the output
+    depends only on the model, the seed and the counts. Players go round-robin
+    onto the teams. Only one chunk is held in memory at a time.
+    """
+    import numpy as np
+    
+    reference_year = season_reference_date(model.season).year
+    draft_class_year = season_start_year(model.season) + 1
+    for chunk, start in enumerate(range(0, count, SYNTHETIC_CHUNK)):
+        n = min(SYNTHETIC_CHUNK, count - start)
+        columns = model.sample(np.random.default_rng([seed, chunk]), n)
+        rating_columns = {key: columns[field] for field, key in SEASON_LINE_STATS.items() if field in columns}
+        for field in ('age', 'height', 'weight'):
+            rating_columns[field] = columns[field]
+        ratings = {key: values.tolist() for key, values in calculate_ratings_batch(rating_columns).items()}
+        values = {field: columns[field].tolist() for field in model.fields}
+        
+        rating_keys = list(RATING_KEYS) + ['overall']
+        for i in range(n):
+            player_stats = {key: values[field][i] for field, key in SEASON_LINE_STATS.items() if field in values}
+            player_stats['gp'] = values['gamesPlayed'][i] if 'gamesPlayed' in values else 0
+            draft_round, draft_pick = columns['draft'][i]
+            college, country = columns['origin'][i]
+            drafted = draft_round not in (None, 'Undrafted')
+            details = {
+                'position': columns['position'][i],
+                'height': values['height'][i],
+                'weight': values['weight'][i],
+                'age': values['age'][i],
+                'birthYear': reference_year - values['age'][i],
+                'yearsExperience': values['yearsExperience'][i],
+                'college': college,
+                'country': country,
+                'draftYear': str(draft_class_year - values['yearsExperience'][i]) if drafted else draft_round,
+                'draftRound': draft_round,
+                'draftPick': draft_pick,
+            }
+            record = assemble_player_record(
+                str(SYNTHETIC_ID_BASE + start + i), f"{columns['firstName'][i]} {columns['lastName'][i]}",
+                team_ids[(start + i) % len(team_ids)], columns['jersey'][i], details,
+                {key: ratings[key][i] for key in rating_keys}, ratings['potential'][i],
+                values['salary'][i], columns['contractYears'][i], player_stats)
+            for field in model.missing_fields:
+                del record['currentSeasonStats'][field]
+            yield record
+
+
+def write_json_array(out: StreamedOutput, items: Iterable[Any]) -> int:
+    """Stream `items` as a JSON array, one item per line.
+
+    Items are not indented: json only uses its C encoder without `indent`, and
+    the pure Python one would take most of the time for a large league.
+    """
+    count = 0
+    out.write('[')
+    for item in items:
+        out.write((',\n' if count else '\n') + json.dumps(item))
+        count += 1
+    out.write('\n]\n' if count else ']')
+    return count
+
+
+def synthesize_league(args: argparse.Namespace) -> Dict:
+    """Write a synthetic league of --synthesize players on --synthetic-teams teams to --output-dir.
+
+    The model is fitted to --fit-from (the real players.json by default). Needs
+    only numpy; nothing is fetched.
+    """
+    start = time.perf_counter()
+    with open(args.fit_from) as f:
+        model = LeagueModel(json.load(f), args.season, force=args.force)
+    os.makedirs(args.output_dir, exist_ok=True)
+    
+    teams_data = synthetic_teams(args.synthetic_teams)
+    files = {}
+    files['teams.json'], _ = write_json_output(os.path.join(args.output_dir, 'teams.json'), teams_data)
+    with metrics.stage('synthesize'):
+        with StreamedOutput(os.path.join(args.output_dir, 'players.json')) as out:
+            players_written = write_json_array(out, iter_synthetic_players(
+                model, args.synthesize, [team['id'] for team in teams_data], args.seed))
+    files['players.json'] = out.info
+    
+    meta = {
+        'generated': datetime.now().isoformat(),
+        'season': args.season,
+        'totalPlayers': players_written,
+        'totalTeams': len(teams_data),
+        'files': files,
+        'source': 'synthetic',
+        'synthetic': {'seed': args.seed, 'fitFrom': os.path.basename(args.fit_from),
+                      'fields': model.fields},
+    }
+    meta, _ = write_stamped_json(os.path.join(args.output_dir, 'meta.json'), meta)
+    print(f"Generated {players_written} players on {len(teams_data)} teams in "
+          f"{time.perf_counter() - start:.2f}s{'' if out.written else ' (unchanged)'}")
+    return meta
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch real NBA data for Basketball GM")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="concurrent player detail requests (default: 1, sequential)")
+    parser.add_argument('--rate', type=float, default=DEFAULT_REQUEST_RATE,
+                        help="initial stats API requests per second")
+    parser.add_argument('--max-rate', type=float, default=MAX_REQUEST_RATE,
+                        help="ceiling for the adaptive request rate")
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES,
+                        help="retries per request on 429/5xx responses and timeouts")
+    parser.add_argument('--stats-url',
+                        help="override the stats API base URL, e.g. http://localhost:8000/stats/{endpoint}")
+    parser.add_argument('--salaries-url', default=SALARIES_URL,
+                        help="override the HoopsHype salaries page URL")
+    parser.add_argument('--salary-crosswalk', metavar='JSON',
+                        help="JSON object of NBA player ID -> HoopsHype name for names that do not "
+                             "match even after normalization")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help="where to write teams.json, players.json and meta.json")
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help="directory for cached API responses")
+    parser.add_argument('--cache-max-mb', type=float, default=CACHE_MAX_BYTES / (1024 * 1024),
+                        help="evict least recently used responses beyond this size")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always fetch from the network and do not write the cache")
+    parser.add_argument('--offline', action='store_true',
+                        help="build only from cached responses, making no network calls")
+    parser.add_argument('--per-player-bios', action='store_true',
+                        help="skip the league-wide bio requests and call CommonPlayerInfo for every player")
+    parser.add_argument('--compact', action='store_true',
+                        help="also write minified per-team shards with columnar ratings")
+    parser.add_argument('--season', default=DEFAULT_SEASON,
+                        help=f"season to build (default: {DEFAULT_SEASON})")
+    parser.add_argument('--backfill', metavar='FIRST:LAST',
+                        help="build every season from FIRST to LAST, e.g. 2004-05:2023-24")
+    parser.add_argument('--backfill-dir', default=BACKFILL_DIR,
+                        help="root directory for backfilled seasons")
+    parser.add_argument('--processes', type=int, default=4,
+                        help="worker processes for --backfill")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR,
+                        help="where finished player records are logged during a build")
+    parser.add_argument('--resume', action='store_true',
+                        help="reuse player records checkpointed by an interrupted run")
+    parser.add_argument('--delta', action='store_true',
+                        help="only fetch players who are new, traded or whose stats changed "
+                             "since the existing players.json")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"profile the build with cProfile; top functions go into {RUN_REPORT_FILE} "
+                             f"and raw stats into {RUN_PROFILE_FILE}")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help=f"trace allocations with tracemalloc and report the peak in {RUN_REPORT_FILE}")
+    parser.add_argument('--rerate', action='store_true',
+                        help="recompute ratings of the players.json in --output-dir from its stored stats, "
+                             "without fetching anything; with --export, recompute them in the warehouse")
+    parser.add_argument('--force', action='store_true',
+                        help="with --rerate, also re-rate players stored without shot attempt volumes, "
+                             "which rates them as taking no threes or free throws; with --synthesize, "
+                             "fit to such a players.json anyway")
+    parser.add_argument('--warehouse', default=WAREHOUSE_PATH,
+                        help="SQLite file every build loads its data into and exports from")
+    parser.add_argument('--export', metavar='SEASONS',
+                        help="write a league from the warehouse instead of fetching, e.g. 2024-25, "
+                             "2021-22,2023-24 or 2019-20:2023-24 (players appear once, from their latest season)")
+    parser.add_argument('--teams', metavar='ABBREVS',
+                        help="with --export, only these teams, e.g. BOS,LAL")
+    parser.add_argument('--synthesize', type=int, metavar='PLAYERS',
+                        help="write a synthetic league of this many players, sampled from distributions "
+                             "fitted to --fit-from, instead of fetching")
+    parser.add_argument('--synthetic-teams', type=int, default=30,
+                        help="number of teams in a --synthesize league")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="random seed for --synthesize; the same seed gives the same league")
+    parser.add_argument('--fit-from', default=os.path.join(OUTPUT_DIR, 'players.json'),
+                        help="players.json the --synthesize distributions are fitted to")
+    args = parser.parse_args(argv)
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the cache; drop --no-cache")
+    if args.backfill and (args.rerate or args.export):
+        parser.error("--rerate and --export work on one --output-dir; drop --backfill")
+    if args.teams and not args.export:
+        parser.error("--teams needs --export")
+    if args.synthesize is not None and (args.backfill or args.rerate or args.export):
+        parser.error("--synthesize writes its own league; drop --backfill, --rerate and --export")
+    if args.synthesize is not None and (args.synthesize < 0 or args.synthetic_teams < 1):
+        parser.error("--synthesize needs a non-negative player count and at least one team")
+    if not (args.rate > 0 and args.max_rate > 0):
+        parser.error("--rate and --max-rate need a positive number of requests per second")
+    return args
+
+
+def configure(args: argparse.Namespace, shared_limiter: Optional[SharedRateLimiter] = None):
+    """Set up the process-wide stats URL, transport and response cache from CLI args."""
+    global transport, response_cache
+    import_fetch_stack()
+    if args.stats_url:
+        NBAStatsHTTP.base_url = args.stats_url
+    transport = Transport(rate=args.rate, max_rate=args.max_rate, retries=args.retries,
+                          pool_size=args.workers + 4, shared_limiter=shared_limiter)
+    if not args.no_cache:
+        response_cache = ResponseCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                                       offline=args.offline)
+
+
+def profile_summary(profiler: 'cProfile.Profile', limit: int = 25) -> List[Dict]:
+    """The `limit` functions with the highest cumulative time in a cProfile capture."""
+    entries = pstats.Stats(profiler).stats
+    top = sorted(entries.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{'function': f"{filename}:{line}({name})", 'calls': calls,
+             'totalSeconds': round(total, 4), 'cumulativeSeconds': round(cumulative, 4)}
+            for (filename, line, name), (_, calls, total, cumulative, _) in top]
+
+
+def build_season(season: str, output_dir: str, args: argparse.Namespace) -> Dict:
+    """Fetch, rate and write one season's teams.json, players.json and meta.json.
+
+    The run's metrics are written to run-report.json alongside. --profile adds a
+    cProfile capture of the building thread (raw stats in run-profile.prof) and
+    --trace-memory the peak traced allocation and its top allocation sites.
+    """
+    global metrics
+    metrics = RunMetrics()
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if args.trace_memory:
+        tracemalloc.start()
     
     teams_data = build_teams_json()
-    with open(os.path.join(OUTPUT_DIR, 'teams.json'), 'w') as f:
-        json.dump(teams_data, f, indent=2)
-    print(f"\nSaved {len(teams_data)} teams")
+    files = {}
+    files['teams.json'], written = write_json_output(os.path.join(output_dir, 'teams.json'), teams_data)
+    print(f"\nSaved {len(teams_data)} teams{'' if written else ' (unchanged)'}")
+    
+    def run_stage(name: str, fn, *fn_args):
+        with metrics.stage(name):
+            return fn(*fn_args)
+    
+    fetched_rosters = []
+    
+    def kept_rosters() -> Iterator[Tuple[str, List[Dict]]]:
+        for team_abbrev, roster in iter_team_rosters(season):
+            fetched_rosters.append((team_abbrev, roster))
+            yield team_abbrev, roster
+    
+    # Stats, salaries and bios are independent of each other and of the rosters, so
+    # they load in the background while rosters stream into the player build
+    previous = load_previous_players(os.path.join(output_dir, 'players.json')) if args.delta else None
+    checkpoint = BuildCheckpoint(os.path.join(args.checkpoint_dir, f"players-{season}.jsonl"), resume=args.resume)
+    with metrics.stage('total'), ThreadPoolExecutor(max_workers=3) as stages:
+        stats = stages.submit(run_stage, 'stats', fetch_all_player_stats, season)
+        salaries = stages.submit(run_stage, 'salaries', fetch_salaries_hoopshype,
+                                 salaries_url_for_season(season, args.salaries_url),
+                                 load_salary_crosswalk(args.salary_crosswalk))
+        bios = None if args.per_player_bios else stages.submit(run_stage, 'bios', fetch_bulk_player_bios, season)
+        with metrics.stage('players'):
+            players_data = build_players_json(kept_rosters(), stats, salaries,
+                                              workers=args.workers,
+                                              checkpoint=checkpoint, previous=previous, bios=bios,
+                                              season=season)
+    
+    # players.json is exported from the warehouse, the same way custom leagues are
+    warehouse = Warehouse(args.warehouse)
+    try:
+        with metrics.stage('warehouse.load'):
+            warehouse.load_season(season, resolve(stats), resolve(salaries).salaries, fetched_rosters, players_data)
+        with metrics.stage('warehouse.export'):
+            players_data = warehouse.export_players([season])
+    finally:
+        warehouse.close()
+    with metrics.stage('write.indexes'):
+        indexes = checked_indexes(players_data, teams_data)
+    if args.compact:
+        with metrics.stage('write.compact'):
+            bundle = encode_compact_bundle(players_data)
+    with metrics.stage('write'):
+        files['players.json'], written = write_json_output(os.path.join(output_dir, 'players.json'), players_data)
+    checkpoint.close(completed=True)
+    print(f"Saved {len(players_data)} players{'' if written else ' (unchanged)'}")
+    
+    meta = {
+        'generated': datetime.now().isoformat(),
+        'season': season,
+        'totalPlayers': len(players_data),
+        'totalTeams': len(teams_data),
+        'files': files,
+    }
+    with metrics.stage('write.indexes'):
+        meta['indexes'] = write_indexes(indexes, output_dir)
+    if args.compact:
+        with metrics.stage('write.compact'):
+            meta['compact'] = write_compact_bundle(bundle, output_dir)
+    meta, _ = write_stamped_json(os.path.join(output_dir, 'meta.json'), meta)
+    
+    metrics.extra['season'] = season
+    metrics.extra['finalRequestRate'] = round(get_transport().limiter.rate, 3)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(output_dir, RUN_PROFILE_FILE))
+        metrics.extra['profile'] = profile_summary(profiler)
+    if args.trace_memory:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        metrics.extra['memory'] = {
+            'currentBytes': current, 'peakBytes': peak,
+            'topAllocations': [{'site': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                               for stat in snapshot.statistics('lineno')[:15]],
+        }
+    write_json_output(os.path.join(output_dir, RUN_REPORT_FILE), metrics.summary())
+    metrics.report()
+    return meta
+
+
+def parse_season_list(spec: str) -> List[str]:
+    """Seasons of a comma-separated list whose items are seasons or FIRST:LAST ranges."""
+    seasons = set()
+    for part in spec.split(','):
+        part = part.strip()
+        seasons.update(season_range(part) if ':' in part else [part])
+    return sorted(seasons)
+
+
+def export_league(args: argparse.Namespace) -> Dict:
+    """Write teams.json, players.json and meta.json of a custom league from the warehouse.
+
+    The league is the --export seasons, optionally cut down to --teams; with
+    --rerate the stored ratings of those seasons are recomputed first. Nothing
+    is fetched, and only numpy is imported (for --rerate).
+    """
+    start = time.perf_counter()
+    seasons = parse_season_list(args.export)
+    team_ids = [normalize_team_abbrev(team.strip().upper()) for team in args.teams.split(',')] if args.teams else None
+    warehouse = Warehouse(args.warehouse)
+    try:
+        missing = sorted(set(seasons) - set(warehouse.seasons()))
+        if missing:
+            raise SystemExit(f"Not in the warehouse {args.warehouse}: {', '.join(missing)}; build them first")
+        if args.rerate:
+            print(f"Re-rated {warehouse.rerate(seasons)} player-seasons")
+        players_data = warehouse.export_players(seasons, team_ids)
+    finally:
+        warehouse.close()
     
-    players_data = build_players_json(rosters, stats, salaries)
-    with open(os.path.join(OUTPUT_DIR, 'players.json'), 'w') as f:
-        json.dump(players_data, f, indent=2)
-    print(f"Saved {len(players_data)} players")
+    # Everything derived is built and checked first, so a failure leaves the output as it was
+    teams_data = [team for team in build_teams_json() if team_ids is None or team['id'] in team_ids]
+    indexes = checked_indexes(players_data, teams_data)
+    bundle = encode_compact_bundle(players_data) if args.compact else None
     
+    os.makedirs(args.output_dir, exist_ok=True)
+    files = {}
+    files['teams.json'], _ = write_json_output(os.path.join(args.output_dir, 'teams.json'), teams_data)
+    files['players.json'], _ = write_json_output(os.path.join(args.output_dir, 'players.json'), players_data)
     meta = {
         'generated': datetime.now().isoformat(),
-        'season': '2024-25',
+        'season': seasons[-1],
         'totalPlayers': len(players_data),
         'totalTeams': len(teams_data),
+        'files': files,
+        'source': 'warehouse',
+        'seasons': seasons,
+    }
+    if team_ids:
+        meta['teams'] = team_ids
+    meta['indexes'] = write_indexes(indexes, args.output_dir)
+    if bundle is not None:
+        meta['compact'] = write_compact_bundle(bundle, args.output_dir)
+    meta, _ = write_stamped_json(os.path.join(args.output_dir, 'meta.json'), meta)
+    print(f"Exported {len(players_data)} players of {len(teams_data)} teams from {', '.join(seasons)} "
+          f"in {time.perf_counter() - start:.2f}s")
+    return meta
+
+
+def _backfill_init(args: argparse.Namespace, shared_limiter: SharedRateLimiter):
+    configure(args, shared_limiter)
+
+
+def _backfill_season(season: str, output_dir: str, args: argparse.Namespace) -> Dict:
+    return build_season(season, output_dir, args)
+
+
+def backfill(args: argparse.Namespace) -> Dict:
+    """Build a range of seasons in worker processes and write the combined index.
+
+    All workers share the response cache directory and one SharedRateLimiter of
+    --max-rate requests per second, so adding processes does not raise the total
+    load on the stats API.
+    """
+    seasons = season_range(args.backfill)
+    root = os.path.join(args.backfill_dir, f"v{DATA_VERSION}")
+    os.makedirs(root, exist_ok=True)
+    shared_limiter = SharedRateLimiter(args.max_rate)
+    
+    results = {}
+    failures = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(args.processes, len(seasons))),
+                             initializer=_backfill_init, initargs=(args, shared_limiter)) as pool:
+        futures = {pool.submit(_backfill_season, season, os.path.join(root, season), args): season
+                   for season in seasons}
+        for future in as_completed(futures):
+            season = futures[future]
+            try:
+                results[season] = future.result()
+                print(f"Finished {season}: {results[season]['totalPlayers']} players")
+            except Exception as e:
+                failures[season] = str(e)
+                print(f"Season {season} failed: {e}")
+    
+    index = {
+        'version': DATA_VERSION,
+        'generated': datetime.now().isoformat(),
+        'seasons': [
+            {'season': season, 'path': season, 'totalPlayers': results[season]['totalPlayers'],
+             'totalTeams': results[season]['totalTeams'], 'generated': results[season]['generated']}
+            for season in seasons if season in results
+        ],
+        'failed': failures,
     }
-    with open(os.path.join(OUTPUT_DIR, 'meta.json'), 'w') as f:
-        json.dump(meta, f, indent=2)
+    write_stamped_json(os.path.join(root, 'index.json'), index)
+    print(f"\nBackfilled {len(results)}/{len(seasons)} seasons into {root}")
+    return index
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    
+    print("=" * 60)
+    print("NBA Data Fetcher for Basketball GM")
+    print("=" * 60)
+    
+    if args.export:
+        export_league(args)
+        return
+    
+    if args.synthesize is not None:
+        try:
+            synthesize_league(args)
+        except ValueError as e:
+            print(f"\nCannot synthesize a league: {e}")
+            sys.exit(1)
+        return
+    
+    if args.rerate:
+        rerate(args.output_dir, force=args.force)
+        return
+    
+    if args.backfill:
+        index = backfill(args)
+        if index['failed']:
+            sys.exit(1)
+        return
+    
+    configure(args)
+    try:
+        build_season(args.season, args.output_dir, args)
+    except CacheMiss as e:
+        print(f"\nOffline build aborted, players.json was left as it was: {e}. "
+              f"Run once without --offline to fill the cache.")
+        sys.exit(1)
     
     print("\n" + "=" * 60)
     print("Data fetch complete!")
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Tests for fetch-nba-data.py
+
+Usage: python3 -m pytest scripts/test_fetch_nba_data.py
+       python3 -m unittest discover -s scripts -p 'test_*.py'
+"""
+
+import importlib.util
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_script(module_name: str, file_name: str):
+    """Import a script whose file name is not a valid module name."""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+fetcher = load_script('fetch_nba_data', 'fetch-nba-data.py')
+
+
+def random_rating_row(rng: random.Random) -> dict:
+    minutes = round(rng.uniform(0, 40), 1)
+    fga = round(rng.uniform(0, 22) * minutes / 38, 1)
+    return {
+        'pts': round(rng.uniform(0, 35), 1), 'reb': round(rng.uniform(0, 14), 1),
+        'ast': round(rng.uniform(0, 11), 1), 'stl': round(rng.uniform(0, 2.5), 1),
+        'blk': round(rng.uniform(0, 3.5), 1), 'min': minutes,
+        'fg_pct': round(rng.uniform(0, 1), 3), 'fg3_pct': round(rng.uniform(0, 1), 3),
+        'ft_pct': round(rng.uniform(0, 1), 3), 'tov': round(rng.uniform(0, 5), 1),
+        'fga': fga, 'fg3a': round(min(fga, rng.uniform(0, 12)), 1), 'fta': round(rng.uniform(0, 10), 1),
+        'age': rng.randint(18, 42), 'height': rng.randint(66, 91), 'weight': rng.randint(150, 320),
+    }
+
+
+class BatchRatingsTest(unittest.TestCase):
+    """calculate_ratings_batch must reproduce calculate_player_ratings exactly."""
+
+    def assert_batch_matches(self, rows):
+        bio_keys = ('age', 'height', 'weight')
+        columns = {key: [row.get(key) for row in rows] for key in {key for row in rows for key in row}}
+        batch = fetcher.calculate_ratings_batch(columns)
+        for i, row in enumerate(rows):
+            # The scalar engine reads missing stats via .get(); None/NaN mean missing to the batch one
+            stats = {key: value for key, value in row.items()
+                     if key not in bio_keys and value is not None
+                     and not (isinstance(value, float) and math.isnan(value))}
+            expected = fetcher.calculate_player_ratings(stats, row['age'], row['height'], row['weight'])
+            expected['potential'] = min(99, expected['overall'] + max(0, 28 - row['age']) * 2)
+            actual = {key: int(values[i]) for key, values in batch.items()}
+            self.assertEqual(actual, expected, f"row {i}: {row}")
+
+    def test_random_rows(self):
+        rng = random.Random(20240601)
+        self.assert_batch_matches([random_rating_row(rng) for _ in range(5000)])
+
+    def test_edge_rows(self):
+        rng = random.Random(7)
+        base = random_rating_row(rng)
+        rows = [
+            {**base, 'min': 0},
+            {**base, 'fga': 0, 'fg3a': 0},
+            {**base, 'fga': 2.0, 'fg3a': 2.0},
+            {**base, 'min': 0, 'fga': 0, 'fg3a': 0, 'fta': 0, 'pts': 0},
+            {**base, 'age': 45, 'height': 60, 'weight': 400},
+        ]
+        self.assert_batch_matches(rows)
+
+    def test_missing_and_null_stats(self):
+        rng = random.Random(11)
+        rows = []
+        for key in fetcher.RATING_STAT_DEFAULTS:
+            row = random_rating_row(rng)
+            del row[key]
+            rows.append(row)
+        rows += [{**random_rating_row(rng), 'fga': None, 'tov': float('nan')},
+                 {**random_rating_row(rng), 'min': None, 'fg_pct': float('nan')}]
+        self.assert_batch_matches(rows)
+
+    def test_missing_columns(self):
+        rng = random.Random(13)
+        rows = []
+        for _ in range(50):
+            row = random_rating_row(rng)
+            del row['fga'], row['fg3a'], row['fta']
+            rows.append(row)
+        self.assert_batch_matches(rows)
+
+    def test_empty_table(self):
+        self.assertEqual(len(fetcher.calculate_ratings_batch({'age': []})['overall']), 0)
+
+
+class RerateTest(unittest.TestCase):
+
+    def record(self, row: dict, attempts: bool) -> dict:
+        line = {field: row[key] for field, key in fetcher.SEASON_LINE_STATS.items()}
+        if not attempts:
+            del line['fgAttempts'], line['fg3Attempts'], line['ftAttempts']
+        return {'age': row['age'], 'height': row['height'], 'weight': row['weight'],
+                'stats': {'overall': 0}, 'potential': 0, 'currentSeasonStats': line}
+
+    def test_records_without_attempt_volumes_keep_their_ratings(self):
+        rng = random.Random(5)
+        rows = [random_rating_row(rng) for _ in range(4)]
+        players = [self.record(row, attempts=i % 2 == 0) for i, row in enumerate(rows)]
+        self.assertEqual(fetcher.rerate_players(players), 2)
+        for i, (row, player) in enumerate(zip(rows, players)):
+            if i % 2:
+                self.assertEqual((player['stats'], player['potential']), ({'overall': 0}, 0))
+            else:
+                stats = {key: row[key] for key in fetcher.RATING_STAT_DEFAULTS}
+                self.assertEqual(player['stats'],
+                                 fetcher.calculate_player_ratings(stats, row['age'], row['height'], row['weight']))
+
+    def test_force_rerates_every_record(self):
+        rng = random.Random(6)
+        players = [self.record(random_rating_row(rng), attempts=False) for _ in range(3)]
+        self.assertEqual(fetcher.rerate_players(players, force=True), 3)
+        self.assertTrue(all(player['stats']['overall'] >= 40 for player in players))
+
+
+def source_players(count: int, attempts: bool = True) -> list:
+    """Player records laid out like players.json, for fitting LeagueModel."""
+    rng = random.Random(17)
+    players = []
+    for i in range(count):
+        row = random_rating_row(rng)
+        stats = {key: row[key] for key in fetcher.RATING_STAT_DEFAULTS}
+        stats['gp'] = rng.randint(1, 82)
+        details = {'position': rng.choice(['PG', 'SG', 'SF', 'PF', 'C']), 'height': row['height'],
+                   'weight': row['weight'], 'age': row['age'], 'birthYear': 2025 - row['age'],
+                   'yearsExperience': rng.randint(0, 15), 'college': 'State', 'country': 'USA',
+                   'draftYear': '2020', 'draftRound': '1', 'draftPick': str(rng.randint(1, 30))}
+        ratings = fetcher.calculate_player_ratings(stats, row['age'], row['height'], row['weight'])
+        player = fetcher.assemble_player_record(str(1000 + i), f"First{i} Last{i}", 'BOS', str(i), details, ratings,
+                                                ratings['overall'], rng.randint(1_100_000, 50_000_000), 2, stats)
+        if not attempts:
+            for field in ('fgAttempts', 'fg3Attempts', 'ftAttempts'):
+                del player['currentSeasonStats'][field]
+        players.append(player)
+    return players
+
+
+class SyntheticLeagueTest(unittest.TestCase):
+
+    def generate(self, model, count=500, seed=1):
+        return list(fetcher.iter_synthetic_players(model, count, ['BOS', 'LAL'], seed))
+
+    def test_same_seed_same_league_and_consistent_ratings(self):
+        model = fetcher.LeagueModel(source_players(200))
+        players = self.generate(model)
+        self.assertEqual(players, self.generate(model))
+        self.assertNotEqual(players, self.generate(model, seed=2))
+        self.assertEqual(set(players[0]['currentSeasonStats']),
+                         set(source_players(1)[0]['currentSeasonStats']))
+        rerated = json.loads(json.dumps(players))
+        self.assertEqual(fetcher.rerate_players(rerated), 0)
+        self.assertEqual(rerated, players)
+
+    def test_source_without_attempt_volumes_is_refused(self):
+        with self.assertRaises(ValueError):
+            fetcher.LeagueModel(source_players(200, attempts=False))
+
+    def test_forced_fit_leaves_out_missing_fields(self):
+        model = fetcher.LeagueModel(source_players(200, attempts=False), force=True)
+        for player in self.generate(model, count=50):
+            self.assertNotIn('fgAttempts', player['currentSeasonStats'])
+            self.assertNotIn('ftAttempts', player['currentSeasonStats'])
+
+
+class WarehouseExportTest(unittest.TestCase):
+    """Mixed-season exports from a warehouse holding two seasons with trades."""
+
+    # season: (team, player index) in build order; player 0 moves ATL -> LAL,
+    # player 3 is only rostered in the older season
+    ROSTERS = {
+        '2023-24': [('ATL', 0), ('ATL', 1), ('BOS', 2), ('BOS', 3)],
+        '2024-25': [('LAL', 0), ('BOS', 2), ('ATL', 1)],
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'warehouse.db')
+        source = source_players(4)
+        warehouse = fetcher.Warehouse(self.path)
+        try:
+            for season, entries in self.ROSTERS.items():
+                rosters = {}
+                players = []
+                for team, i in entries:
+                    player = dict(source[i], teamId=team)
+                    rosters.setdefault(team, []).append({'id': player['nbaId'], 'name': f"First{i} Last{i}",
+                                                         'jersey': str(i), 'position': player['position']})
+                    players.append(player)
+                stats = fetcher.StatsTable({'PLAYER_ID': tuple(player['nbaId'] for player in players)})
+                warehouse.load_season(season, stats, {}, list(rosters.items()), players)
+        finally:
+            warehouse.close()
+
+    def export(self, teams=None):
+        warehouse = fetcher.Warehouse(self.path)
+        try:
+            return [(player['teamId'], player['nbaId'])
+                    for player in warehouse.export_players(list(self.ROSTERS), teams)]
+        finally:
+            warehouse.close()
+
+    def test_players_are_grouped_by_team_from_their_latest_season(self):
+        self.assertEqual(self.export(), [('BOS', '1003'), ('BOS', '1002'), ('LAL', '1000'), ('ATL', '1001')])
+
+    def test_team_filter_applies_after_the_latest_season_pick(self):
+        full = self.export()
+        for teams in (['ATL'], ['ATL', 'BOS']):
+            self.assertEqual(self.export(teams), [entry for entry in full if entry[0] in teams])
+
+    def test_compact_export_reproduces_players_json(self):
+        output_dir = os.path.join(self.tmp.name, 'league')
+        with redirect_stdout(io.StringIO()):
+            fetcher.main(['--export', '2023-24:2024-25', '--compact', '--warehouse', self.path,
+                          '--output-dir', output_dir])
+        with open(os.path.join(output_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        for file_name, info in meta['files'].items():
+            self.assertEqual(fetcher.file_sha256(os.path.join(output_dir, file_name)), info['sha256'])
+        self.assertEqual([shard['team'] for shard in meta['compact']['shards']], ['BOS', 'LAL', 'ATL'])
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def cache_bytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.directory.name, name))
+                   for name in os.listdir(self.directory.name))
+
+    def test_scans_only_when_over_budget_and_evicts_lru(self):
+        payload = {'rows': 'x' * 1000}
+        cache = fetcher.ResponseCache(self.directory.name, max_bytes=100_000)
+        scans = []
+        evict = cache.evict
+        cache.evict = lambda target=None: (scans.append(target), evict(target))
+        for i in range(300):
+            cache.put('commonplayerinfo', {'PlayerID': i}, payload)
+            # Rewriting an entry must not count its bytes twice
+            cache.put('commonplayerinfo', {'PlayerID': i}, payload)
+        self.assertLessEqual(self.cache_bytes(), 100_000)
+        self.assertEqual(cache._bytes, self.cache_bytes())
+        # ~1 KB entries: the cache fills after ~90 writes, then each scan frees ~10 entries
+        self.assertLess(len(scans), 30)
+        self.assertIsNone(cache.get('commonplayerinfo', {'PlayerID': 0}))
+        self.assertEqual(cache.get('commonplayerinfo', {'PlayerID': 299}), payload)
+
+    def test_offline_miss_raises(self):
+        cache = fetcher.ResponseCache(self.directory.name, offline=True)
+        with self.assertRaises(fetcher.CacheMiss):
+            cache.fetch('leaguedashplayerstats', {'season': '2024-25'}, lambda: self.fail("loader called offline"))
+
+    def test_offline_league_wide_stages_abort_on_miss(self):
+        fetcher.import_fetch_stack()
+        previous = fetcher.response_cache
+        fetcher.response_cache = fetcher.ResponseCache(self.directory.name, offline=True)
+        self.addCleanup(setattr, fetcher, 'response_cache', previous)
+        stages = (lambda: fetcher.fetch_all_player_stats('2024-25'),
+                  lambda: fetcher.fetch_salaries_hoopshype('http://127.0.0.1:9/salaries'),
+                  lambda: fetcher.fetch_bulk_player_bios('2024-25'),
+                  lambda: next(fetcher.iter_team_rosters('2024-25')))
+        for stage in stages:
+            with redirect_stdout(io.StringIO()), self.assertRaises(fetcher.CacheMiss):
+                stage()
+
+
+SALARY_ROWS = ('<tbody><tr><td class="name"><a href="/player/1/">Luka Doncic</a></td><td>$43,031,940</td>'
+               '<td>$45,999,660</td><td>-</td></tr>'
+               '<tr><td class="name"><a href="/player/2/">Jalen Brown</a></td><td>$2,087,519</td></tr></tbody>')
+SALARY_EXPECTED = {'luka doncic': {'salary': 43031940, 'yearsRemaining': 2},
+                   'jalen brown': {'salary': 2087519, 'yearsRemaining': 1}}
+
+
+class SalaryParsingTest(unittest.TestCase):
+
+    def test_plain_table(self):
+        html = f'<html><body><table class="hh-salaries-ranking-table">{SALARY_ROWS}</table></body></html>'
+        self.assertEqual(fetcher.parse_salaries_html(html), SALARY_EXPECTED)
+
+    def test_class_name_in_style_and_script_before_table(self):
+        html = ('<html><head><style>.hh-salaries-ranking-table td{padding:0}</style>'
+                '<script>document.querySelector(".hh-salaries-ranking-table")</script></head><body>'
+                '<table class="other"><tr><td><a>Decoy Player</a></td><td>$1,000,000</td></tr></table>'
+                f'<table id="salaries" class="table hh-salaries-ranking-table striped">{SALARY_ROWS}</table>'
+                '</body></html>')
+        self.assertEqual(fetcher.parse_salaries_html(html), SALARY_EXPECTED)
+
+    def test_single_quoted_class(self):
+        html = f"<TABLE CLASS='hh-salaries-ranking-table'>{SALARY_ROWS}</TABLE>"
+        self.assertEqual(fetcher.parse_salaries_html(html), SALARY_EXPECTED)
+
+    def test_similar_class_is_not_the_table(self):
+        html = f'<table class="hh-salaries-ranking-table-header">{SALARY_ROWS}</table>'
+        self.assertEqual(fetcher.parse_salaries_html(html), {})
+
+
+class ParseArgsTest(unittest.TestCase):
+
+    def test_non_positive_rates_are_rejected(self):
+        for argv in (['--rate', '0'], ['--rate', '-1'], ['--max-rate', '0'], ['--rate', 'nan']):
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                fetcher.parse_args(argv)
+        args = fetcher.parse_args(['--rate', '0.5', '--max-rate', '2'])
+        self.assertEqual((args.rate, args.max_rate), (0.5, 2.0))
+
+
+class ConcurrentDetailsTest(unittest.TestCase):
+    """Per-player detail fetching against a local stub with a fixed latency per request."""
+
+    PLAYERS = 40
+    LATENCY = 0.05
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bench = load_script('bench_fetch_nba_data', 'bench-fetch-nba-data.py')
+        cls.stub = cls.bench.StubServer(cls.bench.SyntheticLeague(cls.PLAYERS, seed=3), latency=cls.LATENCY)
+        cls.stub.__enter__()
+        fetcher.NBAStatsHTTP.base_url = cls.stub.base_url + '/stats/{endpoint}'
+        fetcher.response_cache = None
+        fetcher.transport = fetcher.Transport(rate=1e6, max_rate=1e6)
+        with redirect_stdout(io.StringIO()):
+            cls.stats = fetcher.fetch_all_player_stats()
+            cls.rosters = fetcher.fetch_team_rosters()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.__exit__(None, None, None)
+
+    def build(self, workers: int, rate: float = 1e6):
+        fetcher.transport = fetcher.Transport(rate=rate, max_rate=rate, pool_size=workers + 4)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            players = fetcher.build_players_json(self.rosters, self.stats, {}, workers=workers)
+        return time.perf_counter() - start, players
+
+    def test_workers_scale_wall_time_and_keep_output(self):
+        sequential, expected = self.build(workers=1)
+        concurrent, players = self.build(workers=4)
+        self.assertEqual(len(expected), self.PLAYERS)
+        self.assertEqual(players, expected)
+        self.assertGreaterEqual(sequential, self.PLAYERS * self.LATENCY)
+        self.assertGreater(sequential / concurrent, 3, f"{sequential:.2f}s sequential vs {concurrent:.2f}s")
+
+    def checkpointed_ids(self, checkpoint) -> list:
+        with open(checkpoint.path) as f:
+            return [json.loads(line)['nbaId'] for line in f]
+
+    def test_records_are_checkpointed_per_team(self):
+        fetcher.transport = fetcher.Transport(rate=1e6, max_rate=1e6, pool_size=12)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        checkpoint = fetcher.BuildCheckpoint(os.path.join(directory.name, 'players.jsonl'))
+        teams = [(team, roster) for team, roster in self.rosters.items() if roster]
+        seen_before_last = []
+
+        def stream():
+            for i, (team, roster) in enumerate(teams):
+                if i == len(teams) - 1:
+                    seen_before_last.extend(self.checkpointed_ids(checkpoint))
+                time.sleep(self.LATENCY * 2)
+                yield team, roster
+
+        with redirect_stdout(io.StringIO()):
+            players = fetcher.build_players_json(stream(), self.stats, {}, workers=8, checkpoint=checkpoint)
+        checkpoint.close()
+        self.assertGreater(len(seen_before_last), 0)
+        self.assertEqual(self.checkpointed_ids(checkpoint), [player['nbaId'] for player in players])
+
+    def test_roster_failure_keeps_fetched_records(self):
+        fetcher.transport = fetcher.Transport(rate=1e6, max_rate=1e6, pool_size=12)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        checkpoint = fetcher.BuildCheckpoint(os.path.join(directory.name, 'players.jsonl'))
+        teams = [(team, roster) for team, roster in self.rosters.items() if roster][:5]
+
+        def failing_stream():
+            yield from teams
+            raise fetcher.FetchError("roster stage failed")
+
+        with redirect_stdout(io.StringIO()), self.assertRaises(fetcher.FetchError):
+            fetcher.build_players_json(failing_stream(), self.stats, {}, workers=8, checkpoint=checkpoint)
+        checkpoint.close()
+        self.assertEqual(self.checkpointed_ids(checkpoint),
+                         [player['id'] for _, roster in teams for player in roster])
+
+    def test_rate_bounds_wall_time(self):
+        rate = 20.0
+        elapsed, players = self.build(workers=8, rate=rate)
+        self.assertEqual(len(players), self.PLAYERS)
+        # Unthrottled, 8 workers would need about PLAYERS / 8 * LATENCY = 0.25s
+        self.assertGreaterEqual(elapsed, (self.PLAYERS - 1) / rate * 0.9)
+
+
+
+class RosterStageTest(unittest.TestCase):
+
+    def test_stage_times_fetching_not_the_consumer(self):
+        bench = load_script('bench_fetch_nba_data', 'bench-fetch-nba-data.py')
+        with bench.StubServer(bench.SyntheticLeague(60, seed=4), latency=0.01) as stub:
+            fetcher.NBAStatsHTTP.base_url = stub.base_url + '/stats/{endpoint}'
+            fetcher.response_cache = None
+            fetcher.transport = fetcher.Transport(rate=1e6, max_rate=1e6)
+            fetcher.metrics = fetcher.RunMetrics()
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                for _ in fetcher.iter_team_rosters('2024-25'):
+                    time.sleep(0.03)
+            elapsed = time.perf_counter() - start
+        stage = fetcher.metrics.stages['rosters']
+        self.assertEqual(stage['calls'], 30)
+        self.assertGreaterEqual(stage['wallSeconds'], 30 * 0.01)
+        self.assertLess(stage['wallSeconds'], elapsed - 30 * 0.03 * 0.9)
+
+
+class BulkBiosTest(unittest.TestCase):
+    """fetch_bulk_player_bios against a stub serving the two league-wide responses."""
+
+    PLAYERS = 40
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bench = load_script('bench_fetch_nba_data', 'bench-fetch-nba-data.py')
+        cls.league = cls.bench.SyntheticLeague(cls.PLAYERS, seed=5)
+        cls.stub = cls.bench.StubServer(cls.league)
+        cls.stub.__enter__()
+        fetcher.NBAStatsHTTP.base_url = cls.stub.base_url + '/stats/{endpoint}'
+        fetcher.response_cache = None
+        fetcher.transport = fetcher.Transport(rate=1e6, max_rate=1e6)
+        with redirect_stdout(io.StringIO()):
+            cls.stats = fetcher.fetch_all_player_stats('2024-25')
+            cls.rosters = fetcher.fetch_team_rosters('2024-25')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.__exit__(None, None, None)
+
+    def setUp(self):
+        fetcher.metrics = fetcher.RunMetrics()
+        static = dict(self.stub._static)
+        self.addCleanup(setattr, self.stub, '_static', static)
+
+    def serve(self, endpoint: str, response: dict):
+        self.stub._static = {**self.stub._static, endpoint: json.dumps(response).encode()}
+
+    def without_players(self, response: dict, player_ids: set, id_header: str) -> dict:
+        result_set = response['resultSets'][0]
+        column = result_set['headers'].index(id_header)
+        result_set['rowSet'] = [row for row in result_set['rowSet'] if row[column] not in player_ids]
+        return response
+
+    def fetch_bios(self) -> dict:
+        with redirect_stdout(io.StringIO()):
+            return fetcher.fetch_bulk_player_bios('2024-25')
+
+    def build_fetching_details(self, bios: dict) -> list:
+        """Build the league with `bios`; returns the IDs fetch_player_details was called for."""
+        fetched = []
+        fetch_player_details = fetcher.fetch_player_details
+        fetcher.fetch_player_details = lambda player_id, as_of=None: (fetched.append(player_id),
+                                                                      fetch_player_details(player_id, as_of))[1]
+        self.addCleanup(setattr, fetcher, 'fetch_player_details', fetch_player_details)
+        with redirect_stdout(io.StringIO()):
+            players = fetcher.build_players_json(self.rosters, self.stats, {}, bios=bios, season='2024-25')
+        self.assertEqual(len(players), self.PLAYERS)
+        return sorted(fetched)
+
+    def test_parsed_fields(self):
+        bios = self.fetch_bios()
+        self.assertEqual(len(bios), self.PLAYERS)
+        self.assertIn('Undrafted', [player['DRAFT_YEAR'] for player in self.league.players])
+        for player in self.league.players:
+            bio = bios[str(player['PLAYER_ID'])]
+            feet, inches = player['HEIGHT'].split('-')
+            self.assertEqual(bio['height'], int(feet) * 12 + int(inches))
+            self.assertEqual(bio['weight'], int(player['WEIGHT']))
+            self.assertEqual(bio['age'], player['AGE'])
+            self.assertEqual(bio['yearsExperience'], player['SEASON_EXP'])
+            self.assertEqual((bio['draftYear'], bio['draftRound'], bio['draftPick']),
+                             (player['DRAFT_YEAR'], '1', '10'))
+
+    def test_players_missing_from_bulk_tables_are_fetched_per_player(self):
+        ids = [player['PLAYER_ID'] for player in self.league.players]
+        self.serve('playerindex', self.without_players(self.league.player_index_response(), {ids[0]}, 'PERSON_ID'))
+        self.serve('leaguedashplayerbiostats',
+                   self.without_players(self.league.bio_stats_response(), {ids[1]}, 'PLAYER_ID'))
+        bios = self.fetch_bios()
+        self.assertEqual(len(bios), self.PLAYERS - 2)
+        self.assertEqual(self.build_fetching_details(bios), ids[:2])
+
+    def test_malformed_table_falls_back_to_per_player_details(self):
+        response = self.league.player_index_response()
+        result_set = response['resultSets'][0]
+        result_set['headers'] = ['HEIGHT_FT' if header == 'HEIGHT' else header for header in result_set['headers']]
+        self.serve('playerindex', response)
+        self.assertEqual(self.fetch_bios(), {})
+        self.assertIn('Error parsing league-wide bios', fetcher.metrics.errors[0]['message'])
+        ids = sorted(player['PLAYER_ID'] for player in self.league.players)
+        self.assertEqual(self.build_fetching_details({}), ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
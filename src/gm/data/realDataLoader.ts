@@ -80,9 +80,73 @@ export interface RealPlayerData {
     fgPct: number;
     fg3Pct: number;
     ftPct: number;
+    fgAttempts?: number;
+    fg3Attempts?: number;
+    ftAttempts?: number;
   };
 }
 
+/**
+ * Compact per-team shard written by `scripts/fetch-nba-data.py --compact`.
+ * Ratings are stored as parallel arrays, one entry per player in `players`.
+ */
+export interface CompactPlayerShard {
+  version: number;
+  team: string;
+  ratings: Record<keyof RealPlayerData['stats'], number[]>;
+  players: Omit<RealPlayerData, 'stats'>[];
+}
+
+/**
+ * Rebuild full player records from a compact shard
+ */
+export function decodeCompactShard(shard: CompactPlayerShard): RealPlayerData[] {
+  const keys = Object.keys(shard.ratings) as (keyof RealPlayerData['stats'])[];
+  return shard.players.map((player, i) => {
+    const stats = {} as RealPlayerData['stats'];
+    keys.forEach((key) => {
+      stats[key] = shard.ratings[key][i];
+    });
+    return { ...player, stats };
+  });
+}
+
+/**
+ * Lazy-load one team's players from its compact shard.
+ *
+ * Not used by the app yet: LeagueEngine builds every team when a league is created,
+ * through loadRealNBAData(), which still imports the full players.json. No shards
+ * are committed; they exist only after running the script with --compact.
+ */
+export async function loadRealTeamPlayers(teamId: string): Promise<RealPlayerData[]> {
+  const shard = await import(`../../data/real/compact/players-${teamId}.json`);
+  return decodeCompactShard(shard.default as CompactPlayerShard);
+}
+
+/**
+ * Lookup indexes written next to players.json by `scripts/fetch-nba-data.py`.
+ * Player IDs refer to `RealPlayerData.id`; rankings are best overall first.
+ */
+export interface RealDataIndexes {
+  version: number;
+  totalPlayers: number;
+  rosters: Record<string, string[]>;
+  freeAgents: string[];
+  byOverall: string[];
+  byPosition: Record<string, string[]>;
+  /** Values at 0..100 percent (nearest rank), 101 entries each */
+  percentiles: { overall: number[]; potential: number[] };
+  payroll: Record<string, number>;
+}
+
+/**
+ * Lazy-load the precomputed rosters, rankings, percentiles and payrolls
+ */
+export async function loadRealDataIndexes(): Promise<RealDataIndexes> {
+  const indexes = await import('../../data/real/indexes.json');
+  return indexes.default as RealDataIndexes;
+}
+
 /**
  * Generate a coach for a team
  */
@@ -345,5 +409,7 @@ export function isRealDataAvailable(): boolean {
 
 export default {
   loadRealNBAData,
+  loadRealTeamPlayers,
+  loadRealDataIndexes,
   isRealDataAvailable,
 };